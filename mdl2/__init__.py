@@ -9,11 +9,16 @@ bl_info = {
         "category": "Object"
         }
 
-import bpy
+try:
+    import bpy
+except ImportError:
+    #Not running inside of blender (python -m mdl2), only the modules that don't need bpy can be used
+    bpy = None
 
-from .importer import ImportMDL2
-from .exporter import ExportMDL2
-from . import collisionPanel
+if bpy != None:
+    from .importer import ImportMDL2, ImportTextureAlias, ClearSharedImports
+    from .exporter import ExportMDL2
+    from . import collisionPanel
 
 # Only needed if you want to add into a dynamic menu
 def menu_func_import(self, context):
@@ -29,6 +34,9 @@ def register():
     bpy.utils.register_class(ExportMDL2)
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
     collisionPanel.register()
+    #Load the texture aliases up front, imports only re-read them if the json changes
+    ImportTextureAlias()
+    bpy.app.handlers.load_post.append(ClearSharedImports)
 
 
 def unregister():
@@ -37,6 +45,8 @@ def unregister():
     bpy.utils.unregister_class(ExportMDL2)
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     collisionPanel.unregister()
+    if ClearSharedImports in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(ClearSharedImports)
 
 
 if __name__ == "__main__":
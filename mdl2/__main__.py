@@ -0,0 +1,270 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os import path
+from pathlib import Path
+
+from . import reader
+from .catalog import BuildCatalog, SearchCatalog, FindMissingTextures, GetCatalogPath, CatalogFileName, AliasFile
+from .reader import IterMeshes, MDLHeader, ComponentDescriptor, RefPoints, MeshDescriptor, Strings
+from .convert import ConvertMDL, Formats
+from .diff import DiffMDL, FormatVector, PositionTolerance
+from .validator import ValidateMDL
+
+#Command line tools for reading MDLs without blender, run with python -m mdl2 <command>
+
+#Script blender runs for each blend file in export-blends
+BackgroundExportScript = path.join(path.dirname(path.realpath(__file__)), 'backgroundExport.py')
+
+#Gets all the MDLs from the paths, paired with the path to use for the output relative to the output folder
+def FindMDLs(paths):
+    return FindFiles(paths, '.mdl')
+
+def FindFiles(paths, suffix: str):
+    foundFiles = []
+    for inputPath in paths:
+        inputPath = Path(inputPath)
+        if (inputPath.is_dir()):
+            for filePath in sorted(inputPath.rglob('*')):
+                if (filePath.suffix.lower() == suffix and filePath.is_file()):
+                    foundFiles.append((filePath, filePath.relative_to(inputPath)))
+        else:
+            foundFiles.append((inputPath, Path(inputPath.name)))
+    return foundFiles
+
+def InfoCommand(args):
+    for mdlPath, _ in FindMDLs(args.paths):
+        #Only the strip headers are looked at so the vertex counts don't need the whole model decoded
+        vertexCounts = {(mesh.ComponentIndex, mesh.MeshIndex): sum(strip.VertexCount for strip in mesh.Strips) for mesh in IterMeshes(mdlPath)}
+
+        print('MDL:', mdlPath)
+        print('  Components:', MDLHeader.ComponentCount, ' Ref Points:', MDLHeader.RefPointCount, ' Anim Nodes:', MDLHeader.AnimNodeCount, ' Dictionary Entries:', MDLHeader.DictEntriesCount)
+        print('  Component Offset: 0x%X  Ref Point Offset: 0x%X  Anim Node Offset: 0x%X  Dictionary Offset: 0x%X' % (MDLHeader.ComponentDescOffset, MDLHeader.RefPointOffset, MDLHeader.AnimNodeOffset, MDLHeader.DictOffset))
+        print('  Bounding Box Start:', FormatVector(MDLHeader.BoundingBoxStart), ' Length:', FormatVector(MDLHeader.BoundingBoxLength))
+
+        print('  Component Descriptors:')
+        for c, component in enumerate(ComponentDescriptor.Descriptors):
+            print('    [%d] %s  Anim ID: %r  Meshes: %d  Vbones: %d  Origin: %s  Mesh Desc Offset: 0x%X' % (c, component.ComponentName, component.AnimIDName, component.MeshCount, component.VboneCount, FormatVector(component.Origin[:3]), component.MeshDescOffset))
+            for m, mesh in enumerate(MeshDescriptor.Descriptors[c]):
+                print('        [%d] Texture: %s  Strips: %d  Strip Vertices: %d  Strip Offset: 0x%X' % (m, mesh.TextureName, mesh.StripListCount, vertexCounts[(c, m)], mesh.StripListOffset))
+
+        if (len(RefPoints.Points) > 0):
+            print('  Ref Points:')
+            for refPoint in RefPoints.Points:
+                print('    %s  %s' % (refPoint.Name, FormatVector(refPoint.Position)))
+
+        if (args.strings):
+            with open(mdlPath, 'rb') as file:
+                strings = Strings.ReadDictionary(file)
+            print('  String Dictionary:')
+            for string in strings:
+                print('    ' + string)
+        print('')
+    return 0
+
+def ConvertCommand(args):
+    mdlFiles = FindMDLs(args.paths)
+    outputFolder = Path(args.output)
+    jobs = []
+    for mdlPath, relativePath in mdlFiles:
+        jobs.append((mdlPath, outputFolder / relativePath.with_suffix('.' + args.format)))
+
+    failed = 0
+    if (args.jobs > 1):
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=HideTimings) as pool:
+            futures = [(mdlPath, pool.submit(ConvertMDL, mdlPath, outputPath, args.format, args.cache, args.collision_only)) for mdlPath, outputPath in jobs]
+            for mdlPath, future in futures:
+                try:
+                    print(future.result())
+                except Exception as error:
+                    failed += 1
+                    print('Failed to convert ' + str(mdlPath) + ': ' + str(error), file=sys.stderr)
+    else:
+        for mdlPath, outputPath in jobs:
+            try:
+                print(ConvertMDL(mdlPath, outputPath, args.format, args.cache, args.collision_only))
+            except Exception as error:
+                failed += 1
+                print('Failed to convert ' + str(mdlPath) + ': ' + str(error), file=sys.stderr)
+
+    print('Converted', len(jobs) - failed, 'of', len(jobs), 'MDLs')
+    return 1 if failed > 0 else 0
+
+def ValidateCommand(args):
+    invalid = 0
+    for mdlPath, _ in FindMDLs(args.paths):
+        errors, warnings = ValidateMDL(mdlPath)
+        if (len(errors) > 0):
+            invalid += 1
+        print(str(mdlPath) + ': ' + ('OK' if len(errors) == 0 else str(len(errors)) + ' errors') + ('' if len(warnings) == 0 else ', ' + str(len(warnings)) + ' warnings'))
+        for error in errors:
+            print('  Error ' + error)
+        if (not args.errors_only):
+            for warning in warnings:
+                print('  Warning ' + warning)
+    return 1 if invalid > 0 else 0
+
+def DiffCommand(args):
+    oldFiles = dict((relativePath, mdlPath) for mdlPath, relativePath in FindMDLs([args.old]))
+    newFiles = dict((relativePath, mdlPath) for mdlPath, relativePath in FindMDLs([args.new]))
+    #2 files get compared even when their names are different
+    if (len(oldFiles) == 1 and len(newFiles) == 1 and not Path(args.old).is_dir() and not Path(args.new).is_dir()):
+        pairs = [(list(oldFiles.values())[0], list(newFiles.values())[0])]
+    else:
+        pairs = [(oldFiles[relativePath], newFiles[relativePath]) for relativePath in sorted(oldFiles) if relativePath in newFiles]
+        for relativePath in sorted(oldFiles.keys() - newFiles.keys()):
+            print('- ' + str(oldFiles[relativePath]))
+        for relativePath in sorted(newFiles.keys() - oldFiles.keys()):
+            print('+ ' + str(newFiles[relativePath]))
+
+    changed = len(oldFiles.keys() ^ newFiles.keys()) if len(pairs) != 1 else 0
+    if (args.jobs > 1):
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=HideTimings) as pool:
+            results = [(oldPath, newPath, pool.submit(DiffMDL, oldPath, newPath, args.tolerance)) for oldPath, newPath in pairs]
+            results = [(oldPath, newPath, future.result()) for oldPath, newPath, future in results]
+    else:
+        results = [(oldPath, newPath, DiffMDL(oldPath, newPath, args.tolerance)) for oldPath, newPath in pairs]
+
+    for oldPath, newPath, lines in results:
+        if (len(lines) > 0):
+            changed += 1
+            print(str(oldPath) + ' -> ' + str(newPath) + ':')
+            for line in lines:
+                print('  ' + line)
+    print(len(pairs), 'MDLs compared,', changed, 'different')
+    return 1 if changed > 0 else 0
+
+def CatalogBuildCommand(args):
+    scanned, unchanged, removed = BuildCatalog(args.folder, args.db, args.jobs)
+    print('Catalog', GetCatalogPath(args.folder, args.db), 'updated:', scanned, 'MDLs scanned,', unchanged, 'unchanged,', removed, 'removed')
+    return 0
+
+def CatalogSearchCommand(args):
+    if (not GetCatalogPath(args.folder, args.db).is_file()):
+        print('No catalog for', args.folder + ', build it first', file=sys.stderr)
+        return 1
+    results = SearchCatalog(GetCatalogPath(args.folder, args.db), args.text)
+    for mdlPath, field, value in results:
+        print('%s  %s: %s' % (mdlPath, field, value))
+    print(len(results), 'matches')
+    return 0
+
+def CatalogMissingTexturesCommand(args):
+    if (not GetCatalogPath(args.folder, args.db).is_file()):
+        print('No catalog for', args.folder + ', build it first', file=sys.stderr)
+        return 1
+    missing = FindMissingTextures(args.folder, args.db, [AliasFile] + [path.realpath(aliasPath) for aliasPath in args.alias_file])
+    for textureName, mdlPaths in missing:
+        print(textureName + ':')
+        for mdlPath in mdlPaths:
+            print('  ' + mdlPath)
+    print(len(missing), 'missing textures')
+    return 1 if len(missing) > 0 else 0
+
+#Exports blend files with blender in background mode, each blend file in its own blender so they can run at the same time
+def ExportBlendsCommand(args):
+    blendFiles = FindFiles(args.paths, '.blend')
+    outputFolder = Path(args.output)
+    exportFlags = [flag for flag, enabled in (('--batch', args.batch), ('--anim-nodes', args.anim_nodes), ('--verify', args.verify), ('--warnings-as-errors', args.warnings_as_errors)) if enabled]
+    exportFlags += ['--chunk-size', str(args.chunk_size), '--chunk-triangles', str(args.chunk_triangles), '--lod-ratios', args.lod_ratios]
+
+    def ExportBlend(blendPath, relativePath):
+        #The MDLs go in the same folder layout as the blend files
+        command = [args.blender, '-b', '--factory-startup', str(blendPath), '--python-exit-code', '1', '--python', BackgroundExportScript, '--', str(outputFolder / relativePath.parent)] + exportFlags
+        return subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        futures = [(blendPath, pool.submit(ExportBlend, blendPath, relativePath)) for blendPath, relativePath in blendFiles]
+        for blendPath, future in futures:
+            try:
+                process = future.result()
+            except OSError as error:
+                failed += 1
+                print('Failed to run ' + args.blender + ' for ' + str(blendPath) + ': ' + str(error), file=sys.stderr)
+                continue
+            if (process.returncode != 0):
+                failed += 1
+                print('Failed to export ' + str(blendPath) + ':', file=sys.stderr)
+                print(process.stdout, file=sys.stderr)
+            else:
+                print('Exported', blendPath)
+                if (args.verbose):
+                    print(process.stdout)
+
+    print('Exported', len(blendFiles) - failed, 'of', len(blendFiles), 'blend files')
+    return 1 if failed > 0 else 0
+
+def HideTimings():
+    reader.ShowTimings = False
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m mdl2', description='Read and convert Ty 1 MDL2 files without blender')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    infoParser = commands.add_parser('info', help='Print the header, component and mesh tables of MDLs')
+    infoParser.add_argument('paths', nargs='+', help='MDL files or folders to search for MDLs')
+    infoParser.add_argument('--strings', action='store_true', help='Also print the string dictionary')
+    infoParser.set_defaults(function=InfoCommand)
+
+    convertParser = commands.add_parser('convert', help='Convert MDLs to another format')
+    convertParser.add_argument('paths', nargs='+', help='MDL files or folders to search for MDLs')
+    convertParser.add_argument('-o', '--output', required=True, help='Folder to write the converted files to (folder layout is kept)')
+    convertParser.add_argument('-f', '--format', choices=Formats, default='obj', help='Format to convert to')
+    convertParser.add_argument('-j', '--jobs', type=int, default=1, help='Number of MDLs to convert at the same time')
+    convertParser.add_argument('--cache', action='store_true', help='Use the parse cache (same one the importer uses) for the MDLs')
+    convertParser.add_argument('--collision-only', action='store_true', help='Only write the collision meshes, merged into one for each surface type (render meshes are skipped without being decoded)')
+    convertParser.set_defaults(function=ConvertCommand)
+
+    validateParser = commands.add_parser('validate', help='Check the offsets, counts and strip lengths in MDLs against the file size')
+    validateParser.add_argument('paths', nargs='+', help='MDL files or folders to search for MDLs')
+    validateParser.add_argument('--errors-only', action='store_true', help="Don't print the warnings")
+    validateParser.set_defaults(function=ValidateCommand)
+
+    diffParser = commands.add_parser('diff', help='Compare the components and meshes of 2 MDLs, or the MDLs with the same path in 2 folders')
+    diffParser.add_argument('old', help='MDL file or folder of MDLs')
+    diffParser.add_argument('new', help='MDL file or folder of MDLs')
+    diffParser.add_argument('-t', '--tolerance', type=float, default=PositionTolerance, help='Position differences smaller than this are ignored (blender units)')
+    diffParser.add_argument('-j', '--jobs', type=int, default=1, help='Number of MDLs to compare at the same time')
+    diffParser.set_defaults(function=DiffCommand)
+
+    catalogParser = commands.add_parser('catalog', help='Index the MDLs in a folder into a SQLite database and search it, only the headers and tables are read')
+    catalogCommands = catalogParser.add_subparsers(dest='catalogCommand', required=True)
+    catalogBuildParser = catalogCommands.add_parser('build', help='Add new and changed MDLs to the catalog and remove the deleted ones')
+    catalogSearchParser = catalogCommands.add_parser('search', help='Find the MDLs with a path, component name or texture containing the text')
+    catalogMissingParser = catalogCommands.add_parser('missing-textures', help="List the textures the importer wouldn't find in the DDS folders")
+    for subParser in (catalogBuildParser, catalogSearchParser, catalogMissingParser):
+        subParser.add_argument('folder', help='Game data folder the catalog is for')
+        subParser.add_argument('--db', help='Catalog database to use (defaults to ' + CatalogFileName + ' in the folder)')
+    catalogBuildParser.add_argument('-j', '--jobs', type=int, default=1, help='Number of MDLs to scan at the same time')
+    catalogBuildParser.set_defaults(function=CatalogBuildCommand)
+    catalogSearchParser.add_argument('text', help='Text to search for (not case sensitive)')
+    catalogSearchParser.set_defaults(function=CatalogSearchCommand)
+    catalogMissingParser.add_argument('--alias-file', action='append', default=[], help='Extra alias json file merged on top of the bundled aliases, like importer.AddTextureAliasFile (can be given more than once)')
+    catalogMissingParser.set_defaults(function=CatalogMissingTexturesCommand)
+
+    exportParser = commands.add_parser('export-blends', help='Export blend files to MDLs with blender in background mode (needs blender, the addon is loaded from this folder)')
+    exportParser.add_argument('paths', nargs='+', help='Blend files or folders to search for blend files')
+    exportParser.add_argument('-o', '--output', required=True, help='Folder to write the MDLs to (folder layout is kept)')
+    exportParser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'), help='Blender executable to use (defaults to the BLENDER environment variable, or blender)')
+    exportParser.add_argument('-j', '--jobs', type=int, default=1, help='Number of blenders to run at the same time')
+    exportParser.add_argument('--batch', action='store_true', help='Export each root collection as its own MDL named after the collection, otherwise each blend file is 1 MDL named after the file')
+    exportParser.add_argument('--anim-nodes', action='store_true', help='Export the anim nodes and skinning data')
+    exportParser.add_argument('--verify', action='store_true', help='Read each MDL back after writing it and list any mismatches')
+    exportParser.add_argument('--chunk-size', type=float, default=0.0, help='Split components into a grid of components with this cell size, so the game can cull the parts out of view (blender units, 0 to not split)')
+    exportParser.add_argument('--chunk-triangles', type=int, default=0, help='Split components (or grid cells) with more triangles than this into smaller components (0 to not split)')
+    exportParser.add_argument('--lod-ratios', default='', help='Also write lower detail copies of each MDL with these fractions of the triangles, comma separated (0.5,0.25 writes name_lod1.mdl and name_lod2.mdl)')
+    exportParser.add_argument('--warnings-as-errors', action='store_true', help='Count exports with warnings (like clamped UVs or verification mismatches) as failed')
+    exportParser.add_argument('-v', '--verbose', action='store_true', help="Print blender's output for the exports that worked too")
+    exportParser.set_defaults(function=ExportBlendsCommand)
+
+    args = parser.parse_args(argv)
+    HideTimings()
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -0,0 +1,48 @@
+import argparse
+import importlib
+import sys
+import bpy
+
+from os import path
+from pathlib import Path
+
+#Exports the blend file blender was opened with, without a window
+#blender -b <blend file> --python-exit-code 1 --python backgroundExport.py -- <output folder> [--batch] [--anim-nodes] [--verify]
+#python -m mdl2 export-blends runs this for many blend files at once
+
+def Main():
+    #Blender's own arguments are before the --
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='backgroundExport.py', description='Export the open blend file to MDLs')
+    parser.add_argument('output', help='Folder to write the MDLs to')
+    parser.add_argument('--batch', action='store_true', help='Export each root collection as its own MDL (named after the collection), otherwise the MDL is named after the blend file')
+    parser.add_argument('--anim-nodes', action='store_true', help='Export the anim nodes and skinning data')
+    parser.add_argument('--verify', action='store_true', help='Read each MDL back after writing it and list any mismatches')
+    parser.add_argument('--chunk-size', type=float, default=0.0, help='Split components into a grid of components with this cell size (blender units)')
+    parser.add_argument('--chunk-triangles', type=int, default=0, help='Split components with more triangles than this into smaller components')
+    parser.add_argument('--lod-ratios', default='', help='Also write lower detail copies with these fractions of the triangles, comma separated (0.5,0.25 writes name_lod1.mdl and name_lod2.mdl)')
+    parser.add_argument('--warnings-as-errors', action='store_true', help='Fail when the export has any warnings (like clamped UVs or verification mismatches)')
+    args = parser.parse_args(argv)
+
+    #Import the addon from the folder this script is in, so it works without the addon being installed (like with --factory-startup)
+    addonFolder = path.dirname(path.realpath(__file__))
+    sys.path.insert(0, path.dirname(addonFolder))
+    addon = importlib.import_module(path.basename(addonFolder))
+    #The collision properties the exporter reads only exist once it is registered
+    if ('MDLCollisions' not in bpy.types.Object.bl_rna.properties):
+        addon.register()
+    exporter = importlib.import_module(addon.__name__ + '.exporter')
+
+    outputFolder = Path(args.output)
+    outputFolder.mkdir(parents=True, exist_ok=True)
+    blendName = Path(bpy.data.filepath).stem if bpy.data.filepath != '' else 'Untitled'
+    result, reports = exporter.ExportScene(outputFolder / (blendName + '.mdl'), args.batch, args.anim_nodes, args.verify, args.chunk_size, args.chunk_triangles, args.lod_ratios)
+
+    failKinds = {'ERROR', 'WARNING'} if args.warnings_as_errors else {'ERROR'}
+    if ('FINISHED' not in result or any(kind in failKinds for kind, _ in reports)):
+        print('Export of', bpy.data.filepath, 'failed')
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+
+from concurrent.futures import ProcessPoolExecutor
+from os import path
+from pathlib import Path
+
+from . import reader
+from .reader import MDLHeader, ComponentDescriptor, Strings, IterMeshes
+from .collisionTypes import IsCollisionTexture
+from .validator import ValidateMDL
+
+#Index of every MDL in a folder kept in a SQLite database, for searching them and finding missing textures without importing anything
+#Only the header, descriptors, strip headers and string dictionary get read, no strips get decoded
+#Building it again only re-reads the MDLs whose size or modified time changed
+
+CatalogFileName = 'mdl_catalog.sqlite'
+#Bump this when the tables change so old catalogs get rebuilt
+CatalogVersion = 1
+#Same alias table the importer starts with, for finding the textures the same way it does
+AliasFile = path.join(path.dirname(path.realpath(__file__)), "alias_list.json")
+
+Schema = '''
+CREATE TABLE IF NOT EXISTS mdls (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER, mtime_ns INTEGER, error TEXT,
+    component_count INTEGER, ref_point_count INTEGER, anim_node_count INTEGER, vertex_count INTEGER, strip_count INTEGER,
+    bbox_start_x REAL, bbox_start_y REAL, bbox_start_z REAL, bbox_length_x REAL, bbox_length_y REAL, bbox_length_z REAL);
+CREATE TABLE IF NOT EXISTS components (mdl_id INTEGER NOT NULL REFERENCES mdls(id) ON DELETE CASCADE, component_index INTEGER, name TEXT, anim_id TEXT,
+    mesh_count INTEGER, vertex_count INTEGER, strip_count INTEGER, origin_x REAL, origin_y REAL, origin_z REAL);
+CREATE TABLE IF NOT EXISTS meshes (mdl_id INTEGER NOT NULL REFERENCES mdls(id) ON DELETE CASCADE, component_index INTEGER, mesh_index INTEGER,
+    texture TEXT, is_collision INTEGER, vertex_count INTEGER, strip_count INTEGER);
+CREATE TABLE IF NOT EXISTS strings (mdl_id INTEGER NOT NULL REFERENCES mdls(id) ON DELETE CASCADE, string TEXT);
+CREATE INDEX IF NOT EXISTS components_name ON components(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS meshes_texture ON meshes(texture COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS components_mdl ON components(mdl_id);
+CREATE INDEX IF NOT EXISTS meshes_mdl ON meshes(mdl_id);
+CREATE INDEX IF NOT EXISTS strings_mdl ON strings(mdl_id);
+'''
+
+#Everything stored about a MDL, plain values so it can come back from a worker process
+class CatalogEntry:
+    __slots__ = ('Path', 'Size', 'ModifiedTime', 'Error', 'Header', 'Components', 'Meshes', 'Strings')
+
+    def __init__(self, relativePath: str = ''):
+        self.Path = relativePath
+        self.Size = 0
+        self.ModifiedTime = 0
+        #Set when the MDL failed to validate, nothing else gets read then
+        self.Error = None
+        #(component count, ref point count, anim node count, vertex count, strip count, bounding box start xyz, bounding box length xyz)
+        self.Header = None
+        #(component index, name, anim ID, mesh count, vertex count, strip count, origin xyz)
+        self.Components = []
+        #(component index, mesh index, texture, is collision, vertex count, strip count)
+        self.Meshes = []
+        self.Strings = []
+
+def OpenCatalog(databasePath):
+    connection = sqlite3.connect(str(databasePath))
+    connection.execute('PRAGMA foreign_keys = ON')
+    if (connection.execute('PRAGMA user_version').fetchone()[0] != CatalogVersion):
+        connection.executescript('DROP TABLE IF EXISTS strings; DROP TABLE IF EXISTS meshes; DROP TABLE IF EXISTS components; DROP TABLE IF EXISTS mdls;')
+        connection.execute('PRAGMA user_version = %d' % CatalogVersion)
+    connection.executescript(Schema)
+    return connection
+
+def GetCatalogPath(folder, databasePath=None):
+    return Path(databasePath) if databasePath != None else Path(folder) / CatalogFileName
+
+#Reads the parts of the MDL the catalog stores, the vertex counts come from the strip headers
+def ScanMDL(filepath, relativePath: str):
+    entry = CatalogEntry(relativePath)
+    stat = os.stat(filepath)
+    entry.Size = stat.st_size
+    entry.ModifiedTime = stat.st_mtime_ns
+
+    errors, _ = ValidateMDL(filepath)
+    if (len(errors) > 0):
+        entry.Error = errors[0]
+        return entry
+
+    meshCounts = {}
+    for mesh in IterMeshes(filepath):
+        vertexCount = sum(strip.VertexCount for strip in mesh.Strips)
+        entry.Meshes.append((mesh.ComponentIndex, mesh.MeshIndex, mesh.Mesh.TextureName, int(IsCollisionTexture(mesh.Mesh.TextureName)), vertexCount, mesh.Mesh.StripListCount))
+        counts = meshCounts.setdefault(mesh.ComponentIndex, [0, 0])
+        counts[0] += vertexCount
+        counts[1] += mesh.Mesh.StripListCount
+
+    #Going through the meshes read the header and component descriptors
+    for c, component in enumerate(ComponentDescriptor.Descriptors):
+        vertexCount, stripCount = meshCounts.get(c, (0, 0))
+        entry.Components.append((c, component.ComponentName, component.AnimIDName, component.MeshCount, vertexCount, stripCount) + tuple(float(value) for value in component.Origin[:3]))
+    entry.Header = (MDLHeader.ComponentCount, MDLHeader.RefPointCount, MDLHeader.AnimNodeCount, sum(mesh[4] for mesh in entry.Meshes), sum(mesh[5] for mesh in entry.Meshes)) + tuple(float(value) for value in MDLHeader.BoundingBoxStart[:3]) + tuple(float(value) for value in MDLHeader.BoundingBoxLength[:3])
+
+    with open(filepath, 'rb') as file:
+        entry.Strings = Strings.ReadDictionary(file)
+    return entry
+
+#Brings the catalog up to date with the folder, returns (scanned, unchanged, removed) counts
+def BuildCatalog(folder, databasePath=None, jobs: int = 1):
+    folder = Path(folder)
+    connection = OpenCatalog(GetCatalogPath(folder, databasePath))
+    stored = dict((row[0], (row[1], row[2])) for row in connection.execute('SELECT path, size, mtime_ns FROM mdls'))
+
+    found = set()
+    toScan = []
+    for mdlPath in sorted(folder.rglob('*')):
+        if (mdlPath.suffix.lower() != '.mdl' or not mdlPath.is_file()):
+            continue
+        relativePath = mdlPath.relative_to(folder).as_posix()
+        found.add(relativePath)
+        stat = mdlPath.stat()
+        if (stored.get(relativePath) != (stat.st_size, stat.st_mtime_ns)):
+            toScan.append((mdlPath, relativePath))
+
+    if (jobs > 1 and len(toScan) > 1):
+        with ProcessPoolExecutor(max_workers=jobs, initializer=HideTimings) as pool:
+            entries = pool.map(ScanMDL, [str(mdlPath) for mdlPath, _ in toScan], [relativePath for _, relativePath in toScan], chunksize=16)
+            StoreEntries(connection, entries)
+    else:
+        showTimings = reader.ShowTimings
+        reader.ShowTimings = False
+        try:
+            StoreEntries(connection, (ScanMDL(mdlPath, relativePath) for mdlPath, relativePath in toScan))
+        finally:
+            reader.ShowTimings = showTimings
+
+    removed = [relativePath for relativePath in stored if relativePath not in found]
+    connection.executemany('DELETE FROM mdls WHERE path = ?', [(relativePath,) for relativePath in removed])
+    connection.commit()
+    connection.close()
+    return len(toScan), len(found) - len(toScan), len(removed)
+
+def StoreEntries(connection, entries):
+    for entry in entries:
+        #Replacing the row deletes the old components, meshes and strings with it
+        connection.execute('DELETE FROM mdls WHERE path = ?', (entry.Path,))
+        header = entry.Header if entry.Header != None else (None,) * 11
+        mdlID = connection.execute('INSERT INTO mdls VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (entry.Path, entry.Size, entry.ModifiedTime, entry.Error) + header).lastrowid
+        connection.executemany('INSERT INTO components VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(mdlID,) + component for component in entry.Components])
+        connection.executemany('INSERT INTO meshes VALUES (?, ?, ?, ?, ?, ?, ?)', [(mdlID,) + mesh for mesh in entry.Meshes])
+        connection.executemany('INSERT INTO strings VALUES (?, ?)', [(mdlID, string) for string in entry.Strings])
+
+#Finds the MDLs with a component name, texture or path containing the text (not case sensitive)
+#Returns (mdl path, what matched, the matching value) sorted by path
+def SearchCatalog(databasePath, text: str):
+    connection = OpenCatalog(databasePath)
+    pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    results = connection.execute('''
+        SELECT path, 'path', path FROM mdls WHERE path LIKE :pattern ESCAPE '\\'
+        UNION SELECT mdls.path, 'component', components.name FROM components JOIN mdls ON mdls.id = components.mdl_id WHERE components.name LIKE :pattern ESCAPE '\\'
+        UNION SELECT mdls.path, 'texture', meshes.texture FROM meshes JOIN mdls ON mdls.id = meshes.mdl_id WHERE meshes.texture LIKE :pattern ESCAPE '\\'
+        ORDER BY 1, 2, 3''', {'pattern': pattern}).fetchall()
+    connection.close()
+    return results
+
+#Textures the importer wouldn't find, looked for the same way (in the DDS folder next to the MDL, by name, alias or lowercase name)
+#aliasFiles are merged in order like importer.AliasFiles, just the bundled alias list if not given
+#Returns (texture, mdl paths using it) sorted by texture
+def FindMissingTextures(folder, databasePath=None, aliasFiles=None):
+    folder = Path(folder)
+    connection = OpenCatalog(GetCatalogPath(folder, databasePath))
+    rows = connection.execute("SELECT DISTINCT mdls.path, meshes.texture FROM meshes JOIN mdls ON mdls.id = meshes.mdl_id WHERE meshes.is_collision = 0 AND meshes.texture != '' ORDER BY 1").fetchall()
+    connection.close()
+
+    aliases = LoadAliases(aliasFiles if aliasFiles != None else [AliasFile])
+    #Whether each texture file is there, checked with is_file like the importer so the names match the same way (not case sensitive on windows)
+    existingFiles = {}
+    def IsTexture(textureFolder, name):
+        texturePath = textureFolder / (name + '.dds')
+        if (texturePath not in existingFiles):
+            existingFiles[texturePath] = texturePath.is_file()
+        return existingFiles[texturePath]
+
+    missing = {}
+    for mdlPath, textureName in rows:
+        textureFolder = (folder / mdlPath).parent / 'DDS'
+        aliasName = aliases.get(textureName.lower())
+        if (IsTexture(textureFolder, textureName) or (aliasName != None and IsTexture(textureFolder, aliasName)) or IsTexture(textureFolder, textureName.lower())):
+            continue
+        missing.setdefault(textureName, []).append(mdlPath)
+    return sorted(missing.items(), key=lambda item: item[0].lower())
+
+#Later files override the aliases from earlier ones, missing or broken files get skipped like the importer does
+def LoadAliases(aliasFiles: list):
+    aliases = {}
+    for aliasPath in aliasFiles:
+        try:
+            with open(aliasPath) as file:
+                aliases.update((name.lower(), alias) for name, alias in json.load(file).items())
+        except (OSError, ValueError):
+            print(aliasPath + " is missing or not valid, skipping its texture aliases")
+    return aliases
+
+def HideTimings():
+    reader.ShowTimings = False
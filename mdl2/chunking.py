@@ -0,0 +1,98 @@
+import numpy as np
+
+from .writer import MDLModel, ModelComponent, ModelMesh, MaxComponentCount
+
+#Splits big components into smaller ones by where their triangles are, so each gets its own tight bounding box the game can cull with
+#Works on the model the exporter gathered, before it gets written
+
+#Splits every component that spans more than 1 grid cell or has more triangles than the budget (0 turns either off)
+#The grid is lined up with the world origin so the chunks stay the same between exports, cells with too many triangles get halved until they fit the budget
+#Fragments are left alone since their anim ID belongs to the whole component
+#Returns False and leaves the model as it was if there would be more chunks than a MDL can have components
+def ChunkModel(model: MDLModel, cellSize: float = 0.0, triangleBudget: int = 0):
+    if (cellSize <= 0 and triangleBudget <= 0):
+        return True
+    #Chunk names never match a name already in the model
+    usedNames = set(component.Name for component in model.Components)
+    components = []
+    for component in model.Components:
+        if (component.AnimID != None):
+            components.append(component)
+        else:
+            components += ChunkComponent(component, cellSize, triangleBudget, usedNames)
+    if (len(components) > MaxComponentCount):
+        return False
+    model.Components = components
+    return True
+
+def ChunkComponent(component: ModelComponent, cellSize: float, triangleBudget: int, usedNames: set):
+    meshes = [mesh for mesh in component.Meshes if len(mesh.Faces) > 0]
+    if (len(meshes) == 0):
+        return [component]
+    #Every triangle in the component, with the mesh it's from
+    centers = np.concatenate([mesh.Vertices['Position'][mesh.Faces].mean(axis=1) for mesh in meshes])
+    triangleMeshes = np.concatenate([np.full(len(mesh.Faces), m, dtype=np.int32) for m, mesh in enumerate(meshes)])
+    triangleIndices = np.concatenate([np.arange(len(mesh.Faces)) for mesh in meshes])
+
+    if (cellSize > 0):
+        _, triangleCells = np.unique(np.floor(centers / cellSize).astype(np.int64), axis=0, return_inverse=True)
+        triangleCells = triangleCells.reshape(-1)
+        order = np.argsort(triangleCells, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(triangleCells[order])) + 1)
+    else:
+        groups = [np.arange(len(centers))]
+    if (triangleBudget > 0):
+        groups = [split for group in groups for split in SplitGroup(centers, group, triangleBudget)]
+    if (len(groups) <= 1):
+        return [component]
+
+    chunks = []
+    nameIndex = 0
+    for group in groups:
+        while (component.Name + '_' + str(nameIndex) in usedNames):
+            nameIndex += 1
+        chunk = ModelComponent(component.Name + '_' + str(nameIndex))
+        usedNames.add(chunk.Name)
+        chunk.ObjectID = component.ObjectID
+        chunk.SubObjectType = component.SubObjectType
+        #Meshes that shared a vertex buffer still share it, with just the vertices this chunk uses
+        chunkBuffers = {}
+        for m, mesh in enumerate(meshes):
+            faces = mesh.Faces[np.sort(triangleIndices[group[triangleMeshes[group] == m]])]
+            if (len(faces) == 0):
+                continue
+            chunkMesh = ModelMesh(mesh.Name)
+            chunkMesh.TextureName = mesh.TextureName
+            chunkMesh.Faces = faces
+            chunkMesh.Vertices = mesh.Vertices
+            chunkBuffers.setdefault(id(mesh.Vertices), []).append(chunkMesh)
+            chunk.Meshes.append(chunkMesh)
+        for chunkMeshes in chunkBuffers.values():
+            CompactVertices(chunkMeshes)
+
+        positions = np.concatenate([chunkMeshes[0].Vertices['Position'] for chunkMeshes in chunkBuffers.values()])
+        boundingBoxMin = positions.min(axis=0)
+        boundingBoxMax = positions.max(axis=0)
+        chunk.BoundingBoxStart = boundingBoxMin
+        chunk.BoundingBoxLength = boundingBoxMax - boundingBoxMin
+        chunk.Origin = (boundingBoxMin + boundingBoxMax) / 2
+        chunks.append(chunk)
+    return chunks
+
+#Halves the group along its longest side until every part has at most the budget of triangles
+def SplitGroup(centers, group, triangleBudget: int):
+    if (len(group) <= triangleBudget):
+        return [group]
+    groupCenters = centers[group]
+    axis = int(np.argmax(groupCenters.max(axis=0) - groupCenters.min(axis=0)))
+    order = group[np.argsort(groupCenters[:, axis], kind='stable')]
+    half = len(order) // 2
+    return SplitGroup(centers, order[:half], triangleBudget) + SplitGroup(centers, order[half:], triangleBudget)
+
+#Cuts the shared vertex buffer down to the vertices the meshes use, keeping their order
+def CompactVertices(meshes: list):
+    usedVertices = np.unique(np.concatenate([mesh.Faces.reshape(-1) for mesh in meshes]))
+    vertices = meshes[0].Vertices[usedVertices]
+    for mesh in meshes:
+        mesh.Vertices = vertices
+        mesh.Faces = np.searchsorted(usedVertices, mesh.Faces).astype(np.int32)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from .collisionTypes import GetCollisionType
+from .reader import WeldDistance, Strips, VertexData, IterMeshes
+
+#Reads just the collision meshes out of a MDL, for tools that only care about the collision (and the collision only import)
+#Render meshes are skipped without being decoded, and the collision meshes only get their positions, normals and faces decoded
+
+#Returns a dictionary of surface type (the collision texture name) to the welded collision geometry with that type, from every component
+def ReadCollision(filepath):
+    surfaceMeshes = {}
+    for mesh in IterMeshes(filepath):
+        collisionType = GetCollisionType(mesh.Mesh.TextureName)
+        if (collisionType != None):
+            surfaceMeshes.setdefault(collisionType, []).append(Strips.DecodeStrips(mesh.Strips, geometryOnly=True))
+
+    return dict((surfaceType, Strips.WeldVertices(MergeGeometry(meshList), WeldDistance)) for surfaceType, meshList in surfaceMeshes.items())
+
+#Joins the decoded geometry of meshes into one, the faces get offset to the merged vertices
+def MergeGeometry(meshList: list):
+    mergedData = VertexData()
+    vertexOffsets = np.cumsum([0] + [len(meshData.VertexPositions) for meshData in meshList])
+    mergedData.VertexPositions = np.concatenate([meshData.VertexPositions for meshData in meshList])
+    mergedData.Normals = np.concatenate([meshData.Normals for meshData in meshList])
+    mergedData.Faces = np.concatenate([meshData.Faces + vertexOffsets[i] for i, meshData in enumerate(meshList)]).astype(np.int32)
+    return mergedData
@@ -0,0 +1,89 @@
+#Collision types that go in the texture name of collision meshes, names taken from the comments in global.mad
+#Kept separate from the collision panel so the reading code and command line tools can use it without blender
+
+CollisionTypeItems = [
+    ('None', 'None', ''),
+    ('T0103_01_R', 'Standard', ''),
+    ('T0103_01', 'Wood', ''),
+    ('T0103_01_b', 'Rock', ''),
+    ('T0103_01_e', 'Sand', ''),
+    ('T0103_01_d', 'Sandy Sound in a Tunnel', ''),
+    ('T0103_01_o', 'Mud', ''),
+    ('T0103_01_j', 'Ice', ''),
+    ('T0103_01_T', 'Snow', ''),
+    ('T0103_01_Z', 'Snowtop', ''),
+    ('T0103_01_ac', 'Metal', ''),
+    ('T0103_01_f', 'Water Sound', ''),
+    ('T0103_01_i', 'Wall', ''),
+    ('T0103_01_v', 'Metal Wall', ''),
+    ('T0103_01_p', 'Mud Wall', ''),
+    ('T0103_01_Y', 'Soft', ''),
+    ('T0103_01_u', 'Lava', ''),
+    ('T0103_01_c', 'Wood', 'Seems to be the same as the first Wood value'),
+    ('T0103_01_g', 'Green Water?', 'Same as water sound but has two invisible flags'),
+    ('T0103_01_ab', 'Slippery Wood', ''),
+    ('T0103_01_a', 'Slippery Rock', ''),
+    ('T0103_01_K', 'Slippery Sand', ''),
+    ('T0103_01_aj', 'Slippery Metal', ''),
+    ('T0103_01_ah', 'Slippery Metal, Cam Ignore', ''),
+    ('T0103_01_ai', 'Slippery Wood, Cam Ignore', ''),
+    ('T0103_01_L', 'Water Slide', ''),
+    ('T0103_01_x', 'Ice Slide', ''),
+    ('T0103_01_h', 'Rock with Normal Camera?', ''),
+    ('T0103_01_q', 'Turn Around?', ''),
+    ('T0103_01_m', 'Only Collide With Ty', ''),
+    ('T0103_01_S', 'Standard Cam go Through', ''),
+    ('T0103_01_n', 'Camera Can go Through', ''),
+    ('T0103_01_w', 'Enemy Collision Test', ''),
+    ('T0103_01_z', 'Thin Grass Pattern?', ''),
+    ('T0103_01_aa', 'Thick Grass Pattern?', ''),
+    ('T0103_01_ad', 'Rang Pass', ''),
+    ('T0103_01_ae', 'Cam Ignore, Wood', ''),
+    ('T0103_01_af', 'Cam Ignore Wall ID for the Blockers', ''),
+    ('T0103_01_ag', 'Cam and Boomerang go Through', ''),
+    ('T0103_01_ak', 'Cam and Boomerang go Through, Wall ID', ''),
+    ('T0103_01_al', 'T0103_01_al', 'Not sure what this one is for'),
+    ('crate_01', 'crate_01', 'Not sure what this one is for'),
+    ('boomerangnocollide', 'boomerangnocollide', ''),
+    ('RangpassNocam', 'RangpassNocam', ''),
+    ('Custom', 'Custom', 'Manually enter a custom collision type from global.mad')
+]
+
+#Extra collision types from global.mad that aren't in the list above, add to this (then call BuildCollisionLookup) to have them
+#recognised when importing, they get imported and exported as Custom collision
+CustomCollisionIDs = []
+
+#Built by BuildCollisionLookup when the addon is registered, so checking a texture name is just a set/dictionary lookup
+#Just the texture names, without None and Custom
+CollisionIDs = frozenset()
+#Identifiers in the collision type list (what the enum property can be set to)
+EnumCollisionIDs = frozenset()
+#Lowercase texture name to the collision type, for the ones that are still unique when lowercased (T0103_01_Z and T0103_01_z aren't)
+CollisionIDMap = {}
+
+def BuildCollisionLookup():
+    global CollisionIDs, EnumCollisionIDs, CollisionIDMap
+    EnumCollisionIDs = frozenset(item[0] for item in CollisionTypeItems)
+    CollisionIDs = frozenset([collisionID for collisionID in EnumCollisionIDs if collisionID not in ('None', 'Custom')] + CustomCollisionIDs)
+
+    lowercaseIDs = {}
+    for collisionID in CollisionIDs:
+        lowercaseIDs.setdefault(collisionID.lower(), []).append(collisionID)
+    CollisionIDMap = dict((lowercaseID, ids[0]) for lowercaseID, ids in lowercaseIDs.items() if len(ids) == 1)
+
+def AddCustomCollisionID(collisionID: str):
+    if (collisionID not in CustomCollisionIDs):
+        CustomCollisionIDs.append(collisionID)
+        BuildCollisionLookup()
+
+#Returns the collision type for the texture name, or None if its not a collision texture
+def GetCollisionType(textureName: str):
+    if (textureName in CollisionIDs):
+        return textureName
+    return CollisionIDMap.get(textureName.lower())
+
+def IsCollisionTexture(textureName: str):
+    return GetCollisionType(textureName) != None
+
+#Also built here so the command line tools have it without registering the addon
+BuildCollisionLookup()
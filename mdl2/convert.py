@@ -0,0 +1,134 @@
+import numpy as np
+
+from pathlib import Path
+from .parseCache import ReadMDLCached
+from .collision import ReadCollision
+from .reader import ReadMDL, ComponentDescriptor, MeshDescriptor, Strips
+from .validator import ValidateMDL
+
+#Converts MDLs to other formats without blender, used by the command line tools
+#Positions are written the same as the importer makes them (blender units, Z up)
+
+Formats = ('obj', 'ply')
+
+#Collision only just writes the collision meshes, one for each surface type
+def ConvertMDL(filepath, outputPath, format: str, useCache: bool = False, collisionOnly: bool = False):
+    errors, _ = ValidateMDL(filepath)
+    if (len(errors) > 0):
+        raise ValueError('Not a valid MDL, ' + '; '.join(errors))
+    if (collisionOnly):
+        objects = [('Collision', [(surfaceType, surfaceType, meshData) for surfaceType, meshData in ReadCollision(filepath).items()])]
+    else:
+        if (useCache):
+            ReadMDLCached(filepath)
+        else:
+            ReadMDL(filepath)
+        objects = GetObjects()
+    Path(outputPath).parent.mkdir(parents=True, exist_ok=True)
+
+    if (format == 'obj'):
+        WriteOBJ(outputPath, Path(filepath).name, objects)
+    elif (format == 'ply'):
+        WritePLY(outputPath, Path(filepath).name, objects)
+    else:
+        raise ValueError('Unknown format: ' + format)
+
+    vertexCount = sum(len(meshData.VertexPositions) for _, meshes in objects for _, _, meshData in meshes)
+    faceCount = sum(len(meshData.Faces) for _, meshes in objects for _, _, meshData in meshes)
+    if (collisionOnly):
+        return str(filepath) + ' -> ' + str(outputPath) + ' (' + str(len(objects[0][1])) + ' surface types, ' + str(vertexCount) + ' vertices, ' + str(faceCount) + ' faces)'
+    return str(filepath) + ' -> ' + str(outputPath) + ' (' + str(len(objects)) + ' components, ' + str(vertexCount) + ' vertices, ' + str(faceCount) + ' faces)'
+
+#The read components as (name, [(group name, texture name, mesh data)])
+def GetObjects():
+    objects = []
+    for c, component in enumerate(ComponentDescriptor.Descriptors):
+        meshes = [(component.ComponentName + '_' + str(m), MeshDescriptor.Descriptors[c][m].TextureName, meshData) for m, meshData in enumerate(Strips.Objects[c])]
+        objects.append((component.ComponentName, meshes))
+    return objects
+
+def WriteOBJ(outputPath, mdlName: str, objects: list):
+    #OBJ indices start at 1 and carry on through the whole file
+    vertexOffset = 1
+    uvOffset = 1
+    with open(outputPath, 'w', newline='\n') as file:
+        file.write('# ' + mdlName + '\n')
+        for objectName, meshes in objects:
+            file.write('o ' + objectName + '\n')
+            for groupName, textureName, meshData in meshes:
+                file.write('g ' + groupName + '\n')
+                file.write('usemtl ' + textureName + '\n')
+                np.savetxt(file, meshData.VertexPositions, fmt='v %.6f %.6f %.6f')
+                np.savetxt(file, meshData.Normals, fmt='vn %.6f %.6f %.6f')
+
+                faces = meshData.Faces + vertexOffset
+                #Collision meshes don't have any UVs
+                if (len(meshData.LoopUVs) == 0):
+                    np.savetxt(file, np.stack((faces, faces), axis=2).reshape(-1, 6), fmt='f %d//%d %d//%d %d//%d')
+                else:
+                    #UVs are per face corner so the seams stay intact
+                    np.savetxt(file, meshData.LoopUVs, fmt='vt %.6f %.6f')
+                    uvIDs = np.arange(len(meshData.LoopUVs)).reshape(-1, 3) + uvOffset
+                    np.savetxt(file, np.stack((faces, uvIDs, faces), axis=2).reshape(-1, 9), fmt='f %d/%d/%d %d/%d/%d %d/%d/%d')
+
+                vertexOffset += len(meshData.VertexPositions)
+                uvOffset += len(meshData.LoopUVs)
+
+def WritePLY(outputPath, mdlName: str, objects: list):
+    vertexType = np.dtype([('Position', '<f4', 3), ('Normal', '<f4', 3), ('UV', '<f4', 2), ('Colour', 'u1', 4)])
+    faceType = np.dtype([('Count', 'u1'), ('IDs', '<i4', 3)])
+
+    vertexBlocks = []
+    faceBlocks = []
+    vertexOffset = 0
+    for _, meshes in objects:
+        for _, _, meshData in meshes:
+            vertexIDs, cornerIDs, faces = SplitCorners(meshData)
+            vertices = np.zeros(len(vertexIDs), dtype=vertexType)
+            vertices['Position'] = meshData.VertexPositions[vertexIDs]
+            vertices['Normal'] = meshData.Normals[vertexIDs]
+            if (cornerIDs is None):
+                #No UVs and white for collision meshes
+                vertices['Colour'] = 255
+            else:
+                vertices['UV'] = meshData.LoopUVs[cornerIDs]
+                vertices['Colour'] = np.clip(np.rint(meshData.LoopColours[cornerIDs] * 255), 0, 255)
+            vertexBlocks.append(vertices)
+
+            faceBlock = np.zeros(len(faces), dtype=faceType)
+            faceBlock['Count'] = 3
+            faceBlock['IDs'] = faces + vertexOffset
+            faceBlocks.append(faceBlock)
+            vertexOffset += len(vertices)
+
+    vertices = np.concatenate(vertexBlocks) if vertexBlocks else np.zeros(0, dtype=vertexType)
+    faces = np.concatenate(faceBlocks) if faceBlocks else np.zeros(0, dtype=faceType)
+
+    header = ('ply\n'
+        'format binary_little_endian 1.0\n'
+        'comment ' + mdlName + '\n'
+        'element vertex ' + str(len(vertices)) + '\n'
+        'property float x\nproperty float y\nproperty float z\n'
+        'property float nx\nproperty float ny\nproperty float nz\n'
+        'property float s\nproperty float t\n'
+        'property uchar red\nproperty uchar green\nproperty uchar blue\nproperty uchar alpha\n'
+        'element face ' + str(len(faces)) + '\n'
+        'property list uchar int vertex_indices\n'
+        'end_header\n')
+    with open(outputPath, 'wb') as file:
+        file.write(header.encode('ascii'))
+        file.write(vertices.tobytes())
+        file.write(faces.tobytes())
+
+#PLY only has per vertex UVs and colours, so split the vertices that have more than one of them
+#Returns the vertex each new vertex came from, the face corner its UV and colour came from, and the faces using the new vertices
+#Meshes without any face corner data (collision) are left as they are, with None for the face corners
+def SplitCorners(meshData):
+    corners = meshData.Faces.ravel()
+    if (len(corners) == 0):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.int32)
+    if (len(meshData.LoopUVs) == 0):
+        return np.arange(len(meshData.VertexPositions)), None, meshData.Faces
+    keys = np.concatenate((corners[:, None].astype(np.float64), meshData.LoopUVs, meshData.LoopColours), axis=1)
+    _, cornerIDs, newIDs = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return corners[cornerIDs], cornerIDs, newIDs.ravel().reshape(-1, 3).astype(np.int32)
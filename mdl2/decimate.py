@@ -0,0 +1,230 @@
+import heapq
+import math
+import numpy as np
+
+from .writer import MDLModel, ModelComponent, ModelMesh
+from .reader import RunSteps
+from .collisionTypes import IsCollisionTexture
+
+#Makes lower detail copies of a model for LODs, by collapsing the edges that change the shape the least (quadric error metric)
+#Works on the model the exporter gathered, so the LODs get written with the same writer
+
+#Vertices on a open edge, a UV seam (the vertex buffer is already split on them), a edge between 2 materials or a edge with more than 2 faces never move,
+#other vertices can still collapse into them, so the seams and edges stay closed and the textures stay where they are
+#Collapses that turn any face more than this far (dot of the normals before and after) get skipped, stops faces flipping over
+MinNormalDot = 0.2
+#Collapses that would leave a vertex with more faces than this (and more than either vertex already had) get skipped
+#On flat areas every collapse costs nothing, without this the locked vertices pull in everything around them, making long thin faces that each later check has to go through
+MaxVertexFaces = 16
+
+#Returns a copy of the model with about ratio of the triangles in each mesh, collision meshes are copied as they are
+def DecimateModel(model: MDLModel, ratio: float):
+    return RunSteps(DecimateModelSteps(model, ratio))
+
+#Same as DecimateModel, one step for each component
+def DecimateModelSteps(model: MDLModel, ratio: float):
+    lodModel = MDLModel()
+    for name in MDLModel.__slots__:
+        setattr(lodModel, name, getattr(model, name))
+    lodModel.Components = []
+
+    for index, component in enumerate(model.Components):
+        lodComponent = ModelComponent(component.Name)
+        for name in ModelComponent.__slots__:
+            setattr(lodComponent, name, getattr(component, name))
+        lodComponent.Meshes = []
+
+        #Meshes sharing a vertex buffer get decimated together so they still share it
+        bufferMeshes = {}
+        for mesh in component.Meshes:
+            lodMesh = ModelMesh(mesh.Name)
+            lodMesh.TextureName = mesh.TextureName
+            lodMesh.Vertices = mesh.Vertices
+            lodMesh.Faces = mesh.Faces
+            lodComponent.Meshes.append(lodMesh)
+            if (len(mesh.Faces) > 0 and (mesh.TextureName == None or not IsCollisionTexture(mesh.TextureName))):
+                bufferMeshes.setdefault(id(mesh.Vertices), []).append(lodMesh)
+
+        for lodMeshes in bufferMeshes.values():
+            vertices, meshFaces = DecimateBuffer(lodMeshes[0].Vertices, [lodMesh.Faces for lodMesh in lodMeshes], ratio)
+            for lodMesh, faces in zip(lodMeshes, meshFaces):
+                lodMesh.Vertices = vertices
+                lodMesh.Faces = faces
+        lodModel.Components.append(lodComponent)
+        yield (index + 1) / len(model.Components)
+    return lodModel
+
+#Decimates the faces of every mesh using the vertex buffer until each mesh has about ratio of its faces left
+#Returns the new vertex buffer (just the vertices still used) and the faces of each mesh
+def DecimateBuffer(vertices, meshFaces: list, ratio: float):
+    faces = np.concatenate(meshFaces).astype(np.int64)
+    faceMeshes = np.concatenate([np.full(len(meshFaces[m]), m, dtype=np.int32) for m in range(len(meshFaces))])
+    #Each mesh gets its own target, otherwise the flattest mesh would lose most of the faces
+    meshFaceCounts = [len(mesh) for mesh in meshFaces]
+    meshTargets = [max(int(len(mesh) * ratio), 1) for mesh in meshFaces]
+    meshesLeft = sum(count > target for count, target in zip(meshFaceCounts, meshTargets))
+    if (meshesLeft == 0):
+        return vertices, meshFaces
+
+    vertices = vertices.copy()
+    positions = vertices['Position'].astype(np.float64)
+    quadrics = GetQuadrics(positions, faces)
+    locked = GetLockedVertices(faces, faceMeshes, len(vertices))
+
+    #The collapses change a few faces at a time, which is quicker on lists than on small numpy arrays
+    faceList = faces.tolist()
+    faceMeshList = faceMeshes.tolist()
+    positionList = positions.tolist()
+    vertexFaces = [set() for _ in range(len(vertices))]
+    for f, face in enumerate(faceList):
+        for vertex in face:
+            vertexFaces[vertex].add(f)
+    aliveVertices = np.ones(len(vertices), dtype=bool)
+    aliveFaces = np.ones(len(faces), dtype=bool)
+    #Bumped every time a vertex changes, so the heap entries from before are known to be stale
+    stamps = np.zeros(len(vertices), dtype=np.int64)
+
+    edges = np.unique(np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1), axis=0)
+    heap = []
+    PushEdges(heap, quadrics, positions, locked, stamps, edges[:, 0], edges[:, 1])
+
+    while (meshesLeft > 0 and len(heap) > 0):
+        _, u, v, stampU, stampV, choice = heapq.heappop(heap)
+        if (not aliveVertices[u] or not aliveVertices[v] or stamps[u] != stampU or stamps[v] != stampV):
+            continue
+        #Always keep the locked vertex
+        if (locked[v]):
+            u, v = v, u
+            choice = (1, 0, 2)[choice]
+        newPosition = (positions[u], positions[v], (positions[u] + positions[v]) / 2)[choice]
+
+        sharedFaces = vertexFaces[u] & vertexFaces[v]
+        if (len(sharedFaces) == 0):
+            continue
+        #A mesh that is down to its target doesn't lose any more faces
+        if (any(meshFaceCounts[faceMeshList[f]] <= meshTargets[faceMeshList[f]] for f in sharedFaces)):
+            continue
+        if (len(vertexFaces[u]) + len(vertexFaces[v]) - 2 * len(sharedFaces) > max(MaxVertexFaces, len(vertexFaces[u]), len(vertexFaces[v]))):
+            continue
+        if (not CanCollapse(faceList, vertexFaces, u, v, sharedFaces, positionList, newPosition.tolist())):
+            continue
+
+        #Collapse v into u
+        positions[u] = newPosition
+        positionList[u] = newPosition.tolist()
+        if (choice == 1):
+            vertices[u] = vertices[v]
+        elif (choice == 2):
+            MergeVertex(vertices, u, v)
+        quadrics[u] += quadrics[v]
+        for f in sharedFaces:
+            aliveFaces[f] = False
+            for vertex in faceList[f]:
+                vertexFaces[vertex].discard(f)
+            mesh = faceMeshList[f]
+            meshFaceCounts[mesh] -= 1
+            if (meshFaceCounts[mesh] == meshTargets[mesh]):
+                meshesLeft -= 1
+        for f in vertexFaces[v]:
+            faceList[f] = [u if vertex == v else vertex for vertex in faceList[f]]
+            vertexFaces[u].add(f)
+        vertexFaces[v] = set()
+        aliveVertices[v] = False
+        stamps[u] += 1
+
+        neighbours = np.array(sorted(GetNeighbours(faceList, vertexFaces[u]) - {u}), dtype=np.int64)
+        PushEdges(heap, quadrics, positions, locked, stamps, np.full(len(neighbours), u, dtype=np.int64), neighbours)
+
+    vertices['Position'] = positions
+    faces = np.array(faceList, dtype=np.int64).reshape(-1, 3)[aliveFaces]
+    faceMeshes = faceMeshes[aliveFaces]
+    usedVertices = np.unique(faces)
+    faces = np.searchsorted(usedVertices, faces).astype(np.int32)
+    return vertices[usedVertices], [faces[faceMeshes == m] for m in range(len(meshFaces))]
+
+#Sum of the squared distance quadrics of the planes of each vertex's faces, weighted by the face area
+def GetQuadrics(positions, faces):
+    corners = positions[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    doubleAreas = np.linalg.norm(normals, axis=1)
+    normals = np.divide(normals, doubleAreas[:, None], out=np.zeros_like(normals), where=doubleAreas[:, None] > 0)
+    planes = np.column_stack((normals, -(normals * corners[:, 0]).sum(axis=1)))
+    faceQuadrics = planes[:, :, None] * planes[:, None, :] * (doubleAreas / 2)[:, None, None]
+    quadrics = np.zeros((len(positions), 4, 4), dtype=np.float64)
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], faceQuadrics)
+    return quadrics
+
+#Vertices on open edges (which includes the UV seams), edges between materials and edges with more than 2 faces
+def GetLockedVertices(faces, faceMeshes, vertexCount: int):
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    edgeMeshes = np.repeat(faceMeshes, 3)
+    uniqueEdges, edgeIndices, edgeCounts = np.unique(edges, axis=0, return_inverse=True, return_counts=True)
+    edgeIndices = edgeIndices.reshape(-1)
+    minMeshes = np.full(len(uniqueEdges), np.iinfo(np.int32).max, dtype=np.int32)
+    maxMeshes = np.full(len(uniqueEdges), -1, dtype=np.int32)
+    np.minimum.at(minMeshes, edgeIndices, edgeMeshes)
+    np.maximum.at(maxMeshes, edgeIndices, edgeMeshes)
+
+    locked = np.zeros(vertexCount, dtype=bool)
+    locked[uniqueEdges[(edgeCounts != 2) | (minMeshes != maxMeshes)].reshape(-1)] = True
+    return locked
+
+#Works out the cost of collapsing each edge and adds the ones that can collapse to the heap
+#The collapsed vertex goes to the first vertex, the second vertex or the middle, whichever moves the surface the least
+def PushEdges(heap, quadrics, positions, locked, stamps, firstVertices, secondVertices):
+    if (len(firstVertices) == 0):
+        return
+    edgeQuadrics = quadrics[firstVertices] + quadrics[secondVertices]
+    candidates = np.stack((positions[firstVertices], positions[secondVertices], (positions[firstVertices] + positions[secondVertices]) / 2), axis=1)
+    candidates = np.concatenate((candidates, np.ones(candidates.shape[:2] + (1,))), axis=2)
+    errors = np.einsum('eci,eij,ecj->ec', candidates, edgeQuadrics, candidates)
+    #A locked vertex can't move, so the collapse has to go to it
+    errors[locked[firstVertices], 1:] = np.inf
+    errors[locked[secondVertices], 0] = np.inf
+    errors[locked[secondVertices], 2] = np.inf
+    choices = errors.argmin(axis=1)
+    costs = errors[np.arange(len(choices)), choices]
+
+    for e in np.flatnonzero(np.isfinite(costs)).tolist():
+        u = int(firstVertices[e])
+        v = int(secondVertices[e])
+        heapq.heappush(heap, (float(costs[e]), u, v, int(stamps[u]), int(stamps[v]), int(choices[e])))
+
+#Skips collapses that would make the mesh non manifold (the link condition) or flip any of the faces around it
+def CanCollapse(faceList, vertexFaces, u: int, v: int, sharedFaces: set, positionList: list, newPosition: list):
+    oppositeVertices = GetNeighbours(faceList, sharedFaces) - {u, v}
+    if ((GetNeighbours(faceList, vertexFaces[u]) & GetNeighbours(faceList, vertexFaces[v])) - {u, v} != oppositeVertices):
+        return False
+
+    #Only a few faces move, so this is plain python rather than numpy
+    for f in (vertexFaces[u] | vertexFaces[v]) - sharedFaces:
+        face = faceList[f]
+        oldNormal = FaceNormal(*[positionList[vertex] for vertex in face])
+        newNormal = FaceNormal(*[newPosition if vertex == u or vertex == v else positionList[vertex] for vertex in face])
+        oldLength = math.sqrt(Dot(oldNormal, oldNormal))
+        newLength = math.sqrt(Dot(newNormal, newNormal))
+        #Faces that were already degenerate don't count, ones that become degenerate do
+        if (oldLength > 0 and (newLength == 0 or Dot(oldNormal, newNormal) < MinNormalDot * oldLength * newLength)):
+            return False
+    return True
+
+#Every vertex of the faces
+def GetNeighbours(faceList, faceIndices):
+    return set().union(*[faceList[f] for f in faceIndices])
+
+def FaceNormal(a, b, c):
+    ab = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    ac = (c[0] - a[0], c[1] - a[1], c[2] - a[2])
+    return (ab[1] * ac[2] - ab[2] * ac[1], ab[2] * ac[0] - ab[0] * ac[2], ab[0] * ac[1] - ab[1] * ac[0])
+
+def Dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+#Puts the vertex halfway between u and v, the skinning stays the same as u
+def MergeVertex(vertices, u: int, v: int):
+    normal = vertices['Normal'][u] + vertices['Normal'][v]
+    length = np.linalg.norm(normal)
+    vertices['Normal'][u] = normal / length if length > 0 else vertices['Normal'][u]
+    vertices['UV'][u] = (vertices['UV'][u] + vertices['UV'][v]) / 2
+    vertices['Colour'][u] = (vertices['Colour'][u] + vertices['Colour'][v]) / 2
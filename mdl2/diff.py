@@ -0,0 +1,221 @@
+import numpy as np
+
+from .reader import WeldDistance, MDLHeader, ComponentDescriptor, Strips, IterMeshes
+
+#Compares what is in 2 MDLs instead of their bytes, used by the diff command
+#Components are matched by name and meshes by their index in the component
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#Position differences smaller than this are treated as the same (blender units)
+PositionTolerance = 1e-5
+#Without scipy the points go into a grid with about this many points in each cell
+PointsPerCell = 4
+#Most neighbouring cells looked up at a time without scipy, keeps the memory use down
+GridChunkSize = 1024 * 1024
+
+#The parts of a MDL that get compared, read one mesh at a time so the whole model is never decoded at once
+class MDLSummary:
+    __slots__ = ('BoundingBoxStart', 'BoundingBoxLength', 'Components')
+
+    def __init__(self):
+        self.BoundingBoxStart = np.zeros(3, dtype=np.float32)
+        self.BoundingBoxLength = np.zeros(3, dtype=np.float32)
+        self.Components = []
+
+class ComponentSummary:
+    __slots__ = ('Name', 'AnimIDName', 'BoundingBoxStart', 'BoundingBoxLength', 'Origin', 'Meshes')
+
+    def __init__(self, component):
+        self.Name = component.ComponentName
+        self.AnimIDName = component.AnimIDName
+        self.BoundingBoxStart = component.BoundingBoxStart
+        self.BoundingBoxLength = component.BoundingBoxLength
+        self.Origin = component.Origin[:3]
+        self.Meshes = []
+
+class MeshSummary:
+    __slots__ = ('TextureName', 'StripLengths', 'Positions')
+
+    def __init__(self, mesh):
+        self.TextureName = mesh.Mesh.TextureName
+        self.StripLengths = [strip.VertexCount for strip in mesh.Strips]
+        #Welded so the same model stripped differently still lines up
+        self.Positions = Strips.WeldVertices(Strips.DecodeStrips(mesh.Strips), WeldDistance).VertexPositions
+
+def SummariseMDL(filepath):
+    summary = MDLSummary()
+    componentMeshes = {}
+    for mesh in IterMeshes(filepath):
+        componentMeshes.setdefault(mesh.ComponentIndex, []).append(MeshSummary(mesh))
+
+    #Going through the meshes read the header and component descriptors, components without any meshes still need to be added
+    for c, component in enumerate(ComponentDescriptor.Descriptors):
+        componentSummary = ComponentSummary(component)
+        componentSummary.Meshes = componentMeshes.get(c, [])
+        summary.Components.append(componentSummary)
+    summary.BoundingBoxStart = MDLHeader.BoundingBoxStart
+    summary.BoundingBoxLength = MDLHeader.BoundingBoxLength
+    return summary
+
+#Returns the differences as lines of text, empty if they match
+def DiffMDL(oldPath, newPath, tolerance: float = PositionTolerance):
+    oldSummary = SummariseMDL(oldPath)
+    newSummary = SummariseMDL(newPath)
+    lines = []
+
+    for name, oldValue, newValue in (('Bounding box start', oldSummary.BoundingBoxStart, newSummary.BoundingBoxStart), ('Bounding box length', oldSummary.BoundingBoxLength, newSummary.BoundingBoxLength)):
+        if (not np.allclose(oldValue, newValue, atol=tolerance)):
+            lines.append('%s: %s -> %s' % (name, FormatVector(oldValue), FormatVector(newValue)))
+
+    for oldComponent, newComponent in MatchComponents(oldSummary.Components, newSummary.Components):
+        if (newComponent == None):
+            lines.append('- Component %s (%d meshes)' % (oldComponent.Name, len(oldComponent.Meshes)))
+        elif (oldComponent == None):
+            lines.append('+ Component %s (%d meshes)' % (newComponent.Name, len(newComponent.Meshes)))
+        else:
+            componentLines = DiffComponent(oldComponent, newComponent, tolerance)
+            if (len(componentLines) > 0):
+                lines.append('Component %s:' % newComponent.Name)
+                lines += ['  ' + line for line in componentLines]
+    return lines
+
+#Pairs up the components with the same name, in order when there's more than 1 with a name
+def MatchComponents(oldComponents: list, newComponents: list):
+    pairs = []
+    unmatched = list(newComponents)
+    for oldComponent in oldComponents:
+        newComponent = next((component for component in unmatched if component.Name == oldComponent.Name), None)
+        if (newComponent != None):
+            unmatched.remove(newComponent)
+        pairs.append((oldComponent, newComponent))
+    pairs += [(None, newComponent) for newComponent in unmatched]
+    return pairs
+
+def DiffComponent(oldComponent: ComponentSummary, newComponent: ComponentSummary, tolerance: float):
+    lines = []
+    if (oldComponent.AnimIDName != newComponent.AnimIDName):
+        lines.append('Anim ID: %r -> %r' % (oldComponent.AnimIDName, newComponent.AnimIDName))
+    if (not np.allclose(oldComponent.Origin, newComponent.Origin, atol=tolerance)):
+        lines.append('Origin: %s -> %s' % (FormatVector(oldComponent.Origin), FormatVector(newComponent.Origin)))
+    for name, oldValue, newValue in (('Bounding box start', oldComponent.BoundingBoxStart, newComponent.BoundingBoxStart), ('Bounding box length', oldComponent.BoundingBoxLength, newComponent.BoundingBoxLength)):
+        if (not np.allclose(oldValue, newValue, atol=tolerance)):
+            lines.append('%s: %s -> %s' % (name, FormatVector(oldValue), FormatVector(newValue)))
+    if (len(oldComponent.Meshes) != len(newComponent.Meshes)):
+        lines.append('Meshes: %d -> %d' % (len(oldComponent.Meshes), len(newComponent.Meshes)))
+
+    for m in range(max(len(oldComponent.Meshes), len(newComponent.Meshes))):
+        if (m >= len(newComponent.Meshes)):
+            lines.append('- Mesh %d (%s)' % (m, oldComponent.Meshes[m].TextureName))
+            continue
+        if (m >= len(oldComponent.Meshes)):
+            lines.append('+ Mesh %d (%s)' % (m, newComponent.Meshes[m].TextureName))
+            continue
+        oldMesh = oldComponent.Meshes[m]
+        newMesh = newComponent.Meshes[m]
+        if (oldMesh.TextureName != newMesh.TextureName):
+            lines.append('Mesh %d texture: %s -> %s' % (m, oldMesh.TextureName, newMesh.TextureName))
+        if (len(oldMesh.Positions) != len(newMesh.Positions)):
+            lines.append('Mesh %d vertices: %d -> %d (%+d)' % (m, len(oldMesh.Positions), len(newMesh.Positions), len(newMesh.Positions) - len(oldMesh.Positions)))
+        #The meshes own bounds, there's no box for each mesh in the MDL
+        if (len(oldMesh.Positions) > 0 and len(newMesh.Positions) > 0):
+            for name, oldValue, newValue in (('min', oldMesh.Positions.min(axis=0), newMesh.Positions.min(axis=0)), ('max', oldMesh.Positions.max(axis=0), newMesh.Positions.max(axis=0))):
+                if (not np.allclose(oldValue, newValue, atol=tolerance)):
+                    lines.append('Mesh %d bounds %s: %s -> %s' % (m, name, FormatVector(oldValue), FormatVector(newValue)))
+        if (oldMesh.StripLengths != newMesh.StripLengths):
+            lines.append('Mesh %d strips: %d -> %d, average strip length %.2f -> %.2f' % (m, len(oldMesh.StripLengths), len(newMesh.StripLengths), AverageLength(oldMesh.StripLengths), AverageLength(newMesh.StripLengths)))
+        error = MaxPositionError(oldMesh.Positions, newMesh.Positions)
+        if (error > tolerance):
+            lines.append('Mesh %d max position error: %.6f' % (m, error))
+    return lines
+
+def AverageLength(stripLengths: list):
+    return sum(stripLengths) / len(stripLengths) if len(stripLengths) > 0 else 0.0
+
+#Largest distance from a vertex in either mesh to the closest vertex in the other one
+def MaxPositionError(oldPositions, newPositions):
+    if (len(oldPositions) == 0 or len(newPositions) == 0):
+        return 0.0 if len(oldPositions) == len(newPositions) else float('inf')
+    #Most of the time nothing moved, so skip the nearest point search
+    if (oldPositions.shape == newPositions.shape and np.array_equal(oldPositions, newPositions)):
+        return 0.0
+    return max(NearestDistances(oldPositions, newPositions).max(), NearestDistances(newPositions, oldPositions).max())
+
+#Distance from each point to the closest of the other points
+def NearestDistances(points, otherPoints):
+    if (cKDTree != None):
+        return cKDTree(otherPoints).query(points)[0]
+    return GridNearestDistances(np.asarray(points, dtype=np.float64), np.asarray(otherPoints, dtype=np.float64))
+
+#Same as the KD tree query using a uniform grid of the other points, each point only gets compared against the points in the cells around it
+#The search goes out a ring of cells at a time until the closest point found is closer than anything in the next ring could be
+def GridNearestDistances(points, otherPoints):
+    low = otherPoints.min(axis=0)
+    extents = otherPoints.max(axis=0) - low
+    cellSize = GetCellSize(extents, len(otherPoints))
+    dims = np.floor(extents / cellSize).astype(np.int64) + 1
+
+    #The other points sorted by cell, with where each cell starts
+    cells = np.minimum(((otherPoints - low) / cellSize).astype(np.int64), dims - 1)
+    keys = EncodeCells(cells, dims)
+    order = np.argsort(keys, kind='stable')
+    sortedPoints = otherPoints[order]
+    cellKeys, cellStarts, cellCounts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    #Points outside the grid search from the closest cell, everything further out is still at least as far away
+    queryCells = np.clip(np.floor((points - low) / cellSize).astype(np.int64), 0, dims - 1)
+    squaredDistances = np.full(len(points), np.inf)
+    remaining = np.arange(len(points))
+    ring = 0
+    while (len(remaining) > 0):
+        offsets = ShellOffsets(ring, dims)
+        chunkRows = max(1, GridChunkSize // max(len(offsets), 1))
+        for start in range(0, len(remaining) if len(offsets) > 0 else 0, chunkRows):
+            chunk = remaining[start:start + chunkRows]
+            neighbourCells = queryCells[chunk][:, None, :] + offsets[None, :, :]
+            chunkPoints, chunkOffsets = np.nonzero(np.all((neighbourCells >= 0) & (neighbourCells < dims), axis=2))
+            neighbourKeys = EncodeCells(neighbourCells[chunkPoints, chunkOffsets], dims)
+            cellIndices = np.minimum(np.searchsorted(cellKeys, neighbourKeys), len(cellKeys) - 1)
+            found = cellKeys[cellIndices] == neighbourKeys
+            chunkPoints = chunkPoints[found]
+            cellIndices = cellIndices[found]
+
+            #Every pair of point and other point in the found cells
+            counts = cellCounts[cellIndices]
+            pairPoints = np.repeat(chunkPoints, counts)
+            pairOthers = np.repeat(cellStarts[cellIndices] - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+            pairDistances = ((points[chunk][pairPoints] - sortedPoints[pairOthers]) ** 2).sum(axis=1)
+            chunkDistances = squaredDistances[chunk]
+            np.minimum.at(chunkDistances, pairPoints, pairDistances)
+            squaredDistances[chunk] = chunkDistances
+
+        #Every cell has been searched once the ring reaches across the whole grid
+        if (ring >= dims.max() - 1):
+            break
+        remaining = remaining[np.sqrt(squaredDistances[remaining]) > ring * cellSize]
+        ring += 1
+    return np.sqrt(squaredDistances)
+
+#Mesh vertices are spread over a surface, so the cells are sized from the 2 longest sides of the bounding box
+def GetCellSize(extents, pointCount: int):
+    longest, secondLongest = np.sort(extents)[::-1][:2]
+    if (secondLongest > 0):
+        return float(np.sqrt(longest * secondLongest * PointsPerCell / pointCount))
+    if (longest > 0):
+        return float(longest * PointsPerCell / pointCount)
+    return 1.0
+
+def EncodeCells(cells, dims):
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+#Offsets to the cells exactly ring cells away, only going as far as the grid does on each axis
+def ShellOffsets(ring: int, dims):
+    limits = np.minimum(ring, dims - 1)
+    offsets = np.stack(np.meshgrid(*[np.arange(-limit, limit + 1) for limit in limits], indexing='ij'), axis=-1).reshape(-1, 3)
+    return offsets[np.abs(offsets).max(axis=1) == ring]
+
+def FormatVector(vector):
+    return '(' + ', '.join('%.4f' % value for value in vector) + ')'
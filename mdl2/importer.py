@@ -1,777 +1,743 @@
-import struct
-import time
-import bpy
-import bmesh
-import json
-
-from io import BufferedReader
-import os
-# ImportHelper is a helper class, defines filename and
-# invoke() function which calls the file selector.
-from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
-from bpy.types import Operator
-from mathutils import Vector
-from pathlib import Path
-from os import path
-
-ModelScaleRatio = 100
-FilePath = ''
-TextureAlias = {}
-
-def ImportTextureAlias():
-    global TextureAlias
-
-    pluginFile = path.realpath(__file__)
-    #Read in the json
-    with open(path.join(path.dirname(pluginFile), "alias_list.json")) as file:
-        #and convert it to the dictionary
-        TextureAlias = json.loads(file.read())
-
-
-class ImportMDL2(Operator, ImportHelper):
-    """Import MDL2 file from Ty1"""
-    bl_idname = "mdl.importer"  # important since its how bpy.ops.mdl.importer is constructed
-    bl_label = "Import MDL2"
-
-    # ImportHelper mixin class uses this
-    filename_ext = ".mdl"
-
-    filter_glob: StringProperty(
-        default="*.mdl",
-        options={'HIDDEN'},
-        maxlen=255,  # Max internal buffer length, longer would be clamped.
-    )
-
-    # List of operator properties, the attributes will be assigned
-    # to the class instance from the operator settings before calling.
-    SmoothShading: BoolProperty(
-        name="Shade Smooth",
-        description="Apply smooth shading to the imported mesh",
-        default=True,
-    )
-    MergeSubOjects: BoolProperty(
-        name="Merge Sub Object Meshes",
-        description="Merges all meshes in a sub object into 1 mesh \n(Won't merge collision meshes)",
-        default=True,
-    )
-    ImportBoundingBox: BoolProperty(
-        name="Import Bounding Box",
-        description="Import the bounding box from the MDL data, some models use the bounding box for collision (mainly just the tilting platforms)",
-        default=False,
-    )
-    ImportAnimNodes: BoolProperty(
-        name="Import Anim Nodes",
-        description="Imports the animation nodes from animated models and stores skinning data in vertex groups.",
-        default=False,
-    )
-    ImportToMDLCollection: BoolProperty(
-        name="Import to MDL Collection",
-        description="Imports all the MDL Sub Objects into a collection with the same name as the MDL. Intended for use with the batch MDL export option",
-        default=False,
-    )
-    OriginEnum: EnumProperty(
-        name='Origin Position',
-        description='Which origin to use',
-        items=[('ORIGIN_GEOMETRY', 'Model Center', 'Use the center of the model as the origin (Usually gives nicer origin points, but may have some issues exporting certain models with a different origin point)'),
-               ('ORIGIN_CURSOR', 'MDL Origin', 'Use the origin from the MDL file (May be important for some models)')
-        ]
-    )
-
-    def execute(self, context):
-        return CreateModel(self, context, self.filepath, self.SmoothShading, self.MergeSubOjects, self.ImportBoundingBox, self.ImportAnimNodes, self.ImportToMDLCollection, self.OriginEnum)
-
-    
-def CreateModel(self, context, filepath, smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, originEnum):
-
-    self.report({'INFO'}, 'Start Reading MDL')
-    file = open(filepath, "rb")
-    anim_filepath = filepath.replace(".mdl", ".anm")
- 
-    if os.path.exists(anim_filepath) and importAnimNodes:
-        animFile = open(anim_filepath, "rb")
-    elif importAnimNodes:
-        print(anim_filepath + " is missing, unable to import anim nodes")
-        self.report({'WARNING'}, anim_filepath + " is missing, unable to import anim nodes")
-        #Reset it back to false
-        importAnimNodes = False
-    global FilePath
-    FilePath = filepath
-
-    print("MDL:", Path(filepath).name)
-
-    ImportTextureAlias()
-    MDLHeader.GatherValues(file)
-    ComponentDescriptor.GatherValues(file)
-
-    if MDLHeader.RefPointCount != 0:
-        RefPoints.GatherValues(file)
-
-    if MDLHeader.AnimNodeCount != 0 and importAnimNodes:
-        AnimNodes.GatherValues(file, animFile)
-
-    MeshDescriptor.GatherValues(file)
-    Strips.GatherValues(file)
-
-    file.close()
-    
-    CreateBlenderMesh.Create(smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, Path(filepath).stem, originEnum)
-
-    #Add a undo/redo restore point
-    #Makes it so undo doesn't act weirdly sometimes, and fixes the crash when trying to undo the import right after importing it
-    bpy.ops.ed.undo_push(message=('Import ' + Path(filepath).stem))
-    return {'FINISHED'}
-
-
-class MDLHeader:
-    MDLName = ''
-
-    ComponentCount = 0
-    RefPointCount = 0
-    AnimNodeCount = 0
-    ComponentDescOffset = 0
-    RefPointOffset = 0
-    AnimNodeOffset = 0
-
-    BoundingBoxStart = Vector((0, 0, 0))
-    BoundingBoxLength = Vector((0, 0, 0))
-    DictEntriesCount = 0
-    DictOffset = 0
-
-    #Read the mdl header from the mdl file skipping over unneed data
-    def GatherValues(file: BufferedReader):
-        #MDL header
-        #Skip unneeded data for import
-        file.seek(6)
-
-        MDLHeader.ComponentCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
-        MDLHeader.RefPointCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
-        MDLHeader.AnimNodeCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
-        MDLHeader.ComponentDescOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-        MDLHeader.RefPointOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-        MDLHeader.AnimNodeOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-
-        #Seek past 2 unused ints (usually both 0)
-        file.seek(8, 1)
-        MDLHeader.BoundingBoxStart = (Vector(struct.unpack('fff', file.read(12)))/ModelScaleRatio).xzy
-        #Skip the unused W value
-        file.seek(4, 1)
-        MDLHeader.BoundingBoxLength = (Vector(struct.unpack('fff', file.read(12)))/ModelScaleRatio).xzy
-        #Skip the unused W value
-        file.seek(4, 1)
-
-        MDLHeader.DictEntriesCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
-        MDLHeader.DictOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-
-
-class AnimNodes:
-    Nodes = list()
-    NodeNames = []
-
-    def GatherValues(file: BufferedReader, anmFile: BufferedReader):
-        AnimNodes.Nodes = list()
-        AnimNodes.NodeNames = []
-        file.seek(MDLHeader.AnimNodeOffset, 0)
-
-        for n in range(MDLHeader.AnimNodeCount):
-            anmFile.seek(0x40 + 0x20 * n, 0)
-            AnimNodeInstance = AnimNodeData()
-            AnimNodes.Nodes.append(AnimNodeInstance)
-    
-            #Divide by 100 to scale down
-            AnimNodeInstance.Position = Vector(struct.unpack('ffff', file.read(16)))/ModelScaleRatio
-            nodeNameOffset = int.from_bytes(anmFile.read(4), byteorder='little', signed=False)
-            anmFile.seek(nodeNameOffset, 0)
-            name = Strings.Read0EndedString(anmFile)
-            AnimNodeInstance.Name = name
-            print(name)
-            AnimNodes.NodeNames.append(name)
-
-
-
-class ComponentDescriptor:
-    Descriptors = list()
-
-    def GatherValues(file: BufferedReader):
-        
-        ComponentDescriptor.Descriptors = list()
-        file.seek(MDLHeader.ComponentDescOffset)
-        for x in range(MDLHeader.ComponentCount):
-            DescriptorInstance = ComponentData()
-            ComponentDescriptor.Descriptors.append(DescriptorInstance)
-
-            #Seek past the seemingly unused bounding box values
-            file.seek(32, 1)
-            DescriptorInstance.Origin = Vector(struct.unpack('ffff', file.read(16)))/ModelScaleRatio
-            DescriptorInstance.ComponentNameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-            DescriptorInstance.AnimIDOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-
-            #Unknown uint
-            file.seek(4, 1)
-            DescriptorInstance.VboneCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
-
-            #Renderer ID thing, not needed for importing
-            file.seek(2, 1)
-            DescriptorInstance.MeshCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
-            DescriptorInstance.MeshDescOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-
-            #Unknown uint
-            file.seek(4, 1)
-            DescriptorInstance.MiscPtr = int.from_bytes(file.read(4), byteorder='little', signed=False)
-            
-            previousLocation = file.tell()
-            #Get the component name
-            file.seek(DescriptorInstance.ComponentNameOffset)
-            DescriptorInstance.ComponentName = Strings.Read0EndedString(file)
-
-            #Get the animation name
-            file.seek(DescriptorInstance.AnimIDOffset)
-            DescriptorInstance.AnimIDName = Strings.Read0EndedString(file)
-
-            #Jump back to previous location
-            file.seek(previousLocation)
-
-
-class RefPoints:
-    Points = list()
-
-    def GatherValues(file: BufferedReader):
-        RefPoints.Points = list()
-        file.seek(MDLHeader.RefPointOffset)
-
-        for x in range(MDLHeader.RefPointCount):
-            RefPointInstance = RefPointData()
-            RefPoints.Points.append(RefPointInstance)
-    
-            #Divide by 100 to scale down
-            RefPointInstance.Position = Vector(struct.unpack('ffff', file.read(16)))/ModelScaleRatio
-
-            RefPointInstance.NameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-            #Seek past the unknown number that is usually 0
-            file.seek(4, 1)
-
-            RefPointInstance.Weight1 = struct.unpack('f', file.read(4))[0]
-            RefPointInstance.Weight2 = struct.unpack('f', file.read(4))[0]
-            
-            previousLocation = file.tell()
-            #Get the ref point name
-            file.seek(RefPointInstance.NameOffset)
-            RefPointInstance.Name = Strings.Read0EndedString(file)
-
-            #Jump back to previous location
-            file.seek(previousLocation)
-        
-class MeshDescriptor:
-    Descriptors = list()
-
-    def GatherValues(file: BufferedReader):
-        MeshDescriptor.Descriptors = list()
-
-        #Loop through every component
-        for x in range(MDLHeader.ComponentCount):
-            meshes = list()
-            #Seek to the mesh descriptor offset just for the odd cases like the pontoon
-            #where the mesh descriptors aren't one after another
-            file.seek(ComponentDescriptor.Descriptors[x].MeshDescOffset)
-
-            #Loop through all the meshes in that component
-            for i in range(ComponentDescriptor.Descriptors[x].MeshCount):
-                meshInstance = MeshData()
-                meshes.append(meshInstance)
-                meshInstance.TextureNameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-                meshInstance.StripListOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
-                #Skip past the seemingly unused max offset? value
-                file.seek(4, 1)
-                meshInstance.StripListCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
-                
-                previousLocation = file.tell()
-                #Get the texture name
-                file.seek(meshInstance.TextureNameOffset)
-                meshInstance.TextureName = Strings.Read0EndedString(file)
-
-                #Jump back to previous location
-                file.seek(previousLocation)
-            
-            MeshDescriptor.Descriptors.append(meshes)
-                
-class Strips:
-    Objects = list()
-
-    def GatherValues(file: BufferedReader):
-        Strips.Objects = list()
-        startTime = time.time()
-        vertexTime = 0.0
-        normalTime = 0.0
-        UVTime = 0.0
-        colourTime = 0.0
-        faceTime = 0.0
-
-        #Loop through every component
-        for c in range(MDLHeader.ComponentCount):
-            meshes = list()
-            #Loop through all the meshes in that component
-            for m in range(ComponentDescriptor.Descriptors[c].MeshCount):
-                #Jump to the start of the strip
-                file.seek(MeshDescriptor.Descriptors[c][m].StripListOffset)
-
-                stripsData = VertexData()
-                vertexID = 0
-                #Loop through all the strips
-                for s in range(MeshDescriptor.Descriptors[c][m].StripListCount):
-                    faceIDs = [0, 0, 0]
-
-                    #Skip past the 3 unknown ints (ID?, 00 00 00 00 (00 00 00 14 for every one after the first strip), 00 80 02 6C)
-                    #First int for a strip is unique then every one after is (FF FF 00 01)
-                    file.seek(12, 1)
-                    VertexCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
-                    #Skip past 8 unknown ints (00 00 00 00, 00 00 00 00, 00 00 00 00 (sometimes 01 00 00 00), Unique, 00 40 3E 30, 12 04 00 00, 00 00 00 00, 04 01 00 01)
-                    file.seek(32, 1)
-
-                    #Skip past the vertex identifier
-                    file.seek(4, 1)
-                    #Add all the verticies to the list
-                    for v in range(VertexCount):
-                        #Divide to scale the mesh down to a better size with blenders units
-                        vertex = Vector(struct.unpack('fff', file.read(12)))/ModelScaleRatio
-                        vertex.xyz = vertex.xzy
-                        stripsData.VertexPositions.append(vertex)
-                    vertexTime += time.time() - startTime
-                    #reset the start time for the next part
-                    startTime = time.time()
-
-                    #Skip past the normal identifier
-                    file.seek(4, 1)
-                    #Add all the normals and bone 2
-                    for n in range(VertexCount):
-                        normal = Vector(struct.unpack('bbb', file.read(3)))/127
-                        normal.xyz = normal.xzy
-                        normal.normalize()
-                        stripsData.Normals.append(normal)
-                        stripsData.Bone2.append((list(file.read(1))[0] >> 1) - 1)
-                    normalTime += time.time() - startTime
-                    #reset the start time for the next part
-                    startTime = time.time()
-
-                    #Skip past the UV identifier
-                    file.seek(4, 1)
-                    for u in range(VertexCount):
-                        uv = (Vector(struct.unpack('hh', file.read(4)))/4096)
-                        #Vertically flip it with this method if not in the 0-1 range
-                        if (uv.y > 1 or uv.y < 0):
-                            uv.y = (uv.y * -1) + 1
-                        #Else Vertically flip with this
-                        else:
-                            #UVs are inverted vertically so 1 - the vector to invert the 0-1 range, eg. 0 becomes 1, 1 become 0, 0.25 becomes 0.75
-                            uv.y = 1 - uv.y
-                        stripsData.UVs.append(uv)
-                        stripsData.BoneWeight.append(struct.unpack('H', file.read(2))[0]/4096)
-                        stripsData.Bone1.append((struct.unpack('H', file.read(2))[0] >> 2) - 1)
-                    UVTime += time.time() - startTime
-                    #reset the start time for the next part
-                    startTime = time.time()
-                        
-                    #Skip past the Colour identifier
-                    file.seek(4, 1)
-                    for vc in range(VertexCount):
-                        colour = Vector(struct.unpack('BBBB', file.read(4)))
-                        colour = Strips.VectorToColour(colour)
-                        if (colour[3] < 1):
-                            stripsData.TransparentVertexColour = True
-                        stripsData.VertexColours.append(colour)
-                    colourTime += time.time() - startTime
-                    #reset the start time for the next part
-                    startTime = time.time()
-
-                    #Populate the face list
-                    for vertexNum in range(VertexCount):
-                        faceIDs[vertexNum % 3] = vertexID
-                        if (1 < vertexNum):
-                            computedNormal = Strips.ComputedNormal(stripsData.VertexPositions[faceIDs[0]], stripsData.VertexPositions[faceIDs[1]],stripsData.VertexPositions[faceIDs[2]])
-
-                            actualNormal = (stripsData.Normals[faceIDs[0]] + stripsData.Normals[faceIDs[1]] + stripsData.Normals[faceIDs[2]]).normalized()
-
-                            normalDirection = computedNormal.dot(actualNormal)
-                            if (normalDirection >= 0.0):
-                                stripsData.Faces.append([faceIDs[0], faceIDs[1], faceIDs[2]])
-                            else:
-                                stripsData.Faces.append([faceIDs[2], faceIDs[1], faceIDs[0]])
-                        
-                        vertexID += 1
-
-                    faceTime += time.time() - startTime
-                    #reset the start time for the next part
-                    startTime = time.time()
-
-                meshes.append(stripsData)
-
-            Strips.Objects.append(meshes)
-
-        print('Vertex Time (Sec):', vertexTime)
-        print('Normal Time (Sec):', normalTime)
-        print('Colour Time (Sec):', colourTime)
-        print('UV Time (Sec):', UVTime)
-        print('Face Time (Sec):', faceTime)
-        print('Gather Values Total Time (Sec):', (vertexTime + normalTime + colourTime + UVTime + faceTime))
-
-    def ComputedNormal(vertexPos1: Vector, vertexPos2: Vector, vertexPos3: Vector):
-        return ((vertexPos2 - vertexPos1).cross(vertexPos3 - vertexPos1)).normalized()
-
-
-
-    def VectorToColour(ColourVector: Vector):
-        #Loop through each colour channel and convert them to a 0-255 range
-        for b in range(4):
-            if (ColourVector[b] == 0):
-                continue
-            #expression_if_true *if* condition *else* expression_if_false
-            ColourVector[b] = (2*ColourVector[b]-1) if (ColourVector[b] <= 0x80) else (ColourVector[b]-1)*2
-            ColourVector[b] = ColourVector[b]/255
-        return ColourVector
-
-
-class CreateBlenderMesh:
-
-    def Create(shadeSmooth: bool, mergeSubObjects: bool, importBoundingBox: bool, importAnimNodes: bool, importToMDLCollection: bool, mdlName: str, originEnum: EnumProperty):
-        startTime = time.time()
-        #Make sure something is a active object otherwise will get a error
-        if bpy.context.active_object != None:
-            bpy.ops.object.mode_set(mode='OBJECT')
-        #Start with everything deselected so all the origins get set
-        bpy.ops.object.select_all(action='DESELECT')
-
-        if MDLHeader.AnimNodeCount > 0 and importAnimNodes:
-            #Create the collection for the nodes, check if the collection already exists for easier exporting
-            if ('Anim Nodes' not in bpy.data.collections):
-                nodesCollection = bpy.data.collections.new('Anim Nodes')
-                bpy.context.scene.collection.children.link(nodesCollection)
-            else:
-                nodesCollection = bpy.data.collections['Anim Nodes']
-
-            for node in AnimNodes.Nodes:
-                empty = bpy.data.objects.new(node.Name, None)
-                empty.location = node.Position.xzy
-                empty.scale = (0.05, 0.05, 0.05)
-                nodesCollection.objects.link(empty)
-
-        objectsToSelect = []
-
-        if importToMDLCollection:
-            mdlCollection = bpy.data.collections.new(mdlName)
-            bpy.context.scene.collection.children.link(mdlCollection)
-        else:
-            mdlCollection = bpy.context.scene.collection
-
-        for components in range(MDLHeader.ComponentCount):
-            modelCollection = bpy.data.collections.new(ComponentDescriptor.Descriptors[components].ComponentName)
-            mdlCollection.children.link(modelCollection)
-            for meshes in range(ComponentDescriptor.Descriptors[components].MeshCount):
-                #Mesh
-                mesh = bpy.data.meshes.new(ComponentDescriptor.Descriptors[components].ComponentName)
-
-                mesh.from_pydata(Strips.Objects[components][meshes].VertexPositions, [], Strips.Objects[components][meshes].Faces)
-
-                #UVs and vertex colours, and make sure they active
-                mesh.uv_layers.active = mesh.uv_layers.new(name='UV')
-                mesh.vertex_colors.active = mesh.vertex_colors.new(name='Colour')
-                for vertexLoop in mesh.loops:
-                    mesh.uv_layers.active.data[vertexLoop.index].uv = Strips.Objects[components][meshes].UVs[vertexLoop.vertex_index]
-                    mesh.vertex_colors.active.data[vertexLoop.index].color = Strips.Objects[components][meshes].VertexColours[vertexLoop.vertex_index]
-
-
-                #Create the object
-                object = bpy.data.objects.new(ComponentDescriptor.Descriptors[components].ComponentName, mesh)
-                
-                if MDLHeader.AnimNodeCount > 0 and importAnimNodes:
-                    for vert in range(len(Strips.Objects[components][meshes].BoneWeight)):
-                        bone1Name = AnimNodes.NodeNames[Strips.Objects[components][meshes].Bone1[vert]]
-                        bone2Name = AnimNodes.NodeNames[Strips.Objects[components][meshes].Bone2[vert]]
-                        bone1Weight = Strips.Objects[components][meshes].BoneWeight[vert]
-                        bone2Weight = 1 - bone1Weight
-                        if bone1Name in object.vertex_groups:
-                            bone1_vertex_group = object.vertex_groups[bone1Name]
-                        else:
-                            bone1_vertex_group = object.vertex_groups.new(name=bone1Name)
-                        bone1_vertex_group.add([vert], bone1Weight, 'ADD')   
-                        if bone2Name in object.vertex_groups:
-                            bone2_vertex_group = object.vertex_groups[bone2Name]
-                        else:
-                            bone2_vertex_group = object.vertex_groups.new(name=bone2Name)
-                        bone2_vertex_group.add([vert], bone2Weight, 'ADD')   
-
-                #Check if the texture if for a collision type
-                collisionMat = False
-                if (MeshDescriptor.Descriptors[components][meshes].TextureName in enum_members_from_type(type(object.MDLCollisions), 'CollisionTypes')):
-                    object.MDLCollisions.CollisionTypes = MeshDescriptor.Descriptors[components][meshes].TextureName
-                    collisionMat = True
-                
-                #Remove doubles later on after joining the sub object meshes (if they're not a collision mesh), faster to do it then
-                if not mergeSubObjects or collisionMat:
-                    bm = bmesh.new()
-                    bm.from_mesh(mesh)
-                    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.005)
-                    bm.to_mesh(mesh)
-                    mesh.update()
-                    bm.clear()
-                    bm.free()
-
-                #Only make the material if its not a collision material
-                if (not collisionMat):
-                    #Create and add the material
-                    material = GetMaterial(path.join(path.dirname(FilePath), "DDS"), MeshDescriptor.Descriptors[components][meshes].TextureName, Strips.Objects[components][meshes].TransparentVertexColour)
-                    if material:
-                        if object.data.materials:
-                            object.data.materials[0] = material
-                        else:
-                            object.data.materials.append(material)
-                        
-                
-                modelCollection.objects.link(object)
-
-                #Select the object to set its origin
-                object.select_set(True)
-                
-                #Set the origin points
-                #Store the location of current 3d cursor
-                saved_location = bpy.context.scene.cursor.location
-                #Give 3dcursor new coordinates
-                bpy.context.scene.cursor.location = ComponentDescriptor.Descriptors[components].Origin.xzy
-                #Set the origin on the current object to the either the 3dcursor location or the object center based on the enum
-                bpy.ops.object.origin_set(type=originEnum)
-                #Set 3dcursor location back to the stored location
-                bpy.context.scene.cursor.location = saved_location
-
-                #Shade smooth if the option is checked
-                if (shadeSmooth):
-                    bpy.context.view_layer.objects.active = object
-                    bpy.ops.object.shade_smooth()
-                    
-                #Deselect all the objects when done
-                bpy.ops.object.select_all(action='DESELECT')
-
-                if not mergeSubObjects:
-                    objectsToSelect.append(object)
-            
-            if mergeSubObjects:
-                #Get all the meshes in the sub object
-                meshCount = 0
-                for obj in modelCollection.objects:
-                    if obj.MDLCollisions.CollisionTypes != "None":
-                        #Still select them at the end
-                        objectsToSelect.append(obj)
-                        continue
-                    meshCount += 1
-                    #So the name isn't something like ___.001
-                    if meshCount == 1:
-                        bpy.context.view_layer.objects.active = obj
-                    obj.select_set(True)
-                
-                #While it is fine to call join with only 1 mesh, it does give a warning though
-                if meshCount > 1:
-                    bpy.ops.object.join()
-
-                if meshCount != 0:
-                    mesh = bpy.context.view_layer.objects.active.data
-                    bm = bmesh.new()
-                    bm.from_mesh(mesh)
-                    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.005)
-                    bm.to_mesh(mesh)
-                    mesh.update()
-                    bm.clear()
-                    bm.free()
-                    
-                    objectsToSelect.append(bpy.context.view_layer.objects.active)
-
-                    bpy.ops.object.select_all(action='DESELECT')
-            
-        for obj in objectsToSelect:
-            obj.select_set(True)
-        bpy.context.view_layer.objects.active = objectsToSelect[0]
-            
-
-
-        #Bounding box, used for frustum and occlusion culling (probably something different for levels) and collision for tilting platforms
-        if (importBoundingBox):
-            BoundingBox = bpy.data.objects.new('Bounding Box', None)
-            #Get the center of the bounding box
-            BoundingBox.location = (MDLHeader.BoundingBoxStart + (MDLHeader.BoundingBoxStart + MDLHeader.BoundingBoxLength))/2
-            #Halve it as the scale is twice its length
-            BoundingBox.scale = MDLHeader.BoundingBoxLength/2
-
-            bpy.context.scene.collection.objects.link(BoundingBox)
-
-            BoundingBox.empty_display_type = 'CUBE'
-
-
-        if (MDLHeader.RefPointCount > 0):
-            #Create the collection for the ref points, check if the collection already exists for easier exporting, unless its being imported into a MDL collection
-            if ('Ref Points' not in bpy.data.collections or importToMDLCollection):
-                refCollection = bpy.data.collections.new('Ref Points')
-                mdlCollection.children.link(refCollection)
-            else:
-                refCollection = bpy.data.collections['Ref Points']
-
-            #Create the empties for the ref points
-            for refPoint in RefPoints.Points:
-                empty = bpy.data.objects.new(refPoint.Name, None)
-                empty.location = refPoint.Position.xzy
-
-                refCollection.objects.link(empty)
-
-                #Some have the w value set to 0 (w is radius maybe?)
-                empty.empty_display_size = refPoint.Position.w if refPoint.Position.w > 0.05 else 0.05
-                empty.empty_display_type = 'SPHERE'
-
-        print('Create Mesh Time (Sec):', (time.time() - startTime))
-        print('')#Padding Line to separate different imports or exports
-
-def enum_members_from_type(rna_type, prop_str):
-    prop = rna_type.bl_rna.properties[prop_str]
-    return [e.identifier for e in prop.enum_items]
-
-def GetMaterial(texturePath, textureName, transparentVertexColour):
-    if (textureName == ""):
-        print('Empty String')
-        return None
-    textureFound = True
-    #Use the original name instead of the name in the alias (if it has one), just because some are variants in global.mad, like no_grass ones
-    originalName = textureName
-
-    #Check if the image doesn't exist
-    if (not Path(path.join("./", texturePath, textureName + '.dds')).is_file()):
-        #Check if it has a alias
-        if ((textureName.lower() in TextureAlias) and (Path(path.join("./", texturePath, TextureAlias[textureName.lower()] + '.dds')).is_file())):
-            textureName = TextureAlias[textureName.lower()]
-        #Check lowercase name
-        elif (Path(path.join("./", texturePath, textureName.lower() + '.dds')).is_file()):
-            textureName = textureName.lower()
-        else:
-            textureFound = False
-
-    #Check if the material already exists
-    if (originalName in bpy.data.materials):
-        material = bpy.data.materials[originalName]
-        return material
-    
-    material = bpy.data.materials.new(name=originalName)
-    material.use_nodes = True
-    bsdf = material.node_tree.nodes['Principled BSDF']
-    texureImage = material.node_tree.nodes.new('ShaderNodeTexImage') if textureFound else material.node_tree.nodes.new('ShaderNodeRGB')
-    #Just to have the material the same
-    if (not textureFound and transparentVertexColour):
-        placeholderAlpha = material.node_tree.nodes.new('ShaderNodeValue')
-        placeholderAlpha.outputs[0].default_value = 1.0
-    colourMultiply = material.node_tree.nodes.new('ShaderNodeMixRGB')
-    colourMultiply.blend_type = 'MULTIPLY'
-    colourMultiply.inputs['Fac'].default_value = 1.0
-    vertexColour = material.node_tree.nodes.new('ShaderNodeVertexColor')
-
-    textureHasAlpha = False
-    if (textureFound):
-        texureImage.image = bpy.data.images.load(path.join("./", texturePath, textureName + '.dds'))
-        file = open(path.join("./", texturePath, textureName + '.dds'), "rb")
-        file.seek(84)
-        format = file.read(4)
-        #print('DDS DXT format:', format)
-        textureHasAlpha = format == b'DXT5'
-        #print(textureHasAlpha)
-        file.close()
-
-    else:
-        texureImage.outputs[0].default_value = (1, 1, 1, 1)
-    material.node_tree.links.new(colourMultiply.inputs['Color1'], texureImage.outputs['Color'])
-    material.node_tree.links.new(colourMultiply.inputs['Color2'], vertexColour.outputs['Color'])
-    material.node_tree.links.new(bsdf.inputs['Base Color'], colourMultiply.outputs['Color'])
-
-    #Check if the image has a alpha channel
-    if (textureHasAlpha or transparentVertexColour):
-        #Set up the alpha
-        mathNode = material.node_tree.nodes.new('ShaderNodeMath')
-        mathNode.operation = 'MULTIPLY'
-        material.node_tree.links.new(mathNode.inputs[0], texureImage.outputs['Alpha'] if textureFound else placeholderAlpha.outputs[0])
-        material.node_tree.links.new(mathNode.inputs[1], vertexColour.outputs['Alpha'])
-        material.node_tree.links.new(bsdf.inputs['Alpha'], mathNode.outputs[0])
-        
-        material.blend_method = 'HASHED'
-        #This will cause a error in blender 4
-        if  bpy.app.version < (4, 0, 0):
-            material.shadow_method = 'HASHED'
-        
-    return material
-
-
-class Strings:
-
-    def Read0EndedString(file: BufferedReader):
-        resultString = ''
-        #Have to add this because file.peek(1) is being dumb and reading the whole rest of the file instead of one byte like it should
-        currentValue = file.read(1)
-
-        #Loop through until find the end of the string
-        while (currentValue != b'\x00'):
-            #Failsafe to make it so it won't go past the end of the file looking for a 0, python also doesn't throw a error when past the end of the file
-            #Also sometimes some models have a sting offset that is past the end of the file
-            if (file.tell() > Path(file.name).stat().st_size):
-                #Discard the string and just assume its bad
-                return ''
-            resultString += currentValue.decode('utf-8')
-            currentValue = file.read(1)
-        return resultString
-
-
-
-
-class ComponentData:
-    Origin = Vector((0.0, 0.0, 0.0, 0.0))
-    ComponentNameOffset = 0
-    ComponentName = ''
-    AnimIDOffset = 0
-    #Blank if no ID
-    AnimIDName = ''
-    VboneCount = 0
-    MeshCount = 0
-    MeshDescOffset = 0
-    MiscPtr = 0
-
-class AnimNodeData:
-    Position = Vector((0.0, 0.0, 0.0, 0.0))
-    Name = "Node"
-
-class RefPointData:
-    Position = Vector((0.0, 0.0, 0.0, 0.0))
-    NameOffset = 0
-    Name = ''
-    Weight1 = 0.0
-    Weight2 = 0.0
-
-class MeshData:
-    TextureNameOffset = 0
-    TextureName = ''
-    StripListOffset = 0
-    StripListCount = 0
-
-class VertexData:
-
-    def __init__(self):
-        self.VertexPositions = []
-        self.Faces = []
-        self.Normals = []
-        self.Bone2 = []
-        self.UVs = []
-        self.BoneWeight = []
-        self.Bone1 = []
-        self.VertexColours = []
-
-    VertexPositions = []
-
-    #Vertex index in the vertex position list
-    Faces = []
-
-    Normals = []
-    Bone2 = []
-
-    UVs = []
-    BoneWeight = []
-    Bone1 = []
-
-    VertexColours = []
-    TransparentVertexColour = False
+import time
+import bpy
+import json
+import numpy as np
+
+import os
+
+from fnmatch import fnmatchcase
+# ImportHelper is a helper class, defines filename and
+# invoke() function which calls the file selector.
+from bpy_extras.io_utils import ImportHelper
+from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.types import Operator
+from bpy.app.handlers import persistent
+from mathutils import Vector
+from . import collisionTypes as CollisionTypes
+from . import parseCache as ParseCache
+from .validator import ValidateMDL
+from .collision import ReadCollision
+from .reader import WeldDistance, MDLHeader, AnimNodes, ComponentDescriptor, RefPoints, MeshDescriptor, Strips, VertexData, ReadDescriptors, MapFile, RunSteps, ScaleSteps
+from .modalSteps import ModalSteps
+from pathlib import Path
+from os import path
+
+FilePath = ''
+#Merged alias table from every alias file, keys are lowercase so lookups only need to lowercase the texture name
+TextureAlias = {}
+#Alias files in load order, later files override the aliases from earlier ones
+AliasFiles = [path.join(path.dirname(path.realpath(__file__)), "alias_list.json")]
+#Parsed alias files, keyed by path with the modified time they were read at
+AliasFileCache = {}
+
+def LoadAliasFile(aliasPath):
+    modifiedTime = os.stat(aliasPath).st_mtime_ns
+    cached = AliasFileCache.get(aliasPath)
+    #Only re-parse the file if it changed since it was last read
+    if (cached != None and cached[0] == modifiedTime):
+        return False
+
+    #Read in the json
+    with open(aliasPath) as file:
+        #and convert it to the dictionary, lowercasing the names once here instead of on every lookup
+        aliases = {name.lower(): alias for name, alias in json.loads(file.read()).items()}
+    AliasFileCache[aliasPath] = (modifiedTime, aliases)
+    return True
+
+#Cheap to call before every import, only the alias files that changed since the last call get re-parsed
+def ImportTextureAlias():
+    global TextureAlias
+
+    changed = False
+    for aliasPath in AliasFiles:
+        if (not path.isfile(aliasPath)):
+            #Drop it from the table if it got deleted
+            if (AliasFileCache.pop(aliasPath, None) != None):
+                changed = True
+                print(aliasPath + " is missing, skipping its texture aliases")
+            continue
+        changed = LoadAliasFile(aliasPath) or changed
+
+    #Nothing changed, can keep using the merged table from last time
+    if (not changed and TextureAlias):
+        return
+
+    mergedAlias = {}
+    for aliasPath in AliasFiles:
+        if (aliasPath in AliasFileCache):
+            mergedAlias.update(AliasFileCache[aliasPath][1])
+    TextureAlias = mergedAlias
+
+#Adds a user alias json file (same layout as alias_list.json) that gets merged on top of the bundled aliases
+def AddTextureAliasFile(aliasPath):
+    aliasPath = path.realpath(aliasPath)
+    if (not path.isfile(aliasPath)):
+        print(aliasPath + " is missing, unable to add the texture aliases")
+        return
+    if (aliasPath not in AliasFiles):
+        AliasFiles.append(aliasPath)
+        #Force the merged table to be rebuilt, the already parsed files are reused
+        TextureAlias.clear()
+    ImportTextureAlias()
+
+def RemoveTextureAliasFile(aliasPath):
+    aliasPath = path.realpath(aliasPath)
+    #Don't allow removing the bundled alias list
+    if (aliasPath in AliasFiles[1:]):
+        AliasFiles.remove(aliasPath)
+        AliasFileCache.pop(aliasPath, None)
+        TextureAlias.clear()
+        ImportTextureAlias()
+
+
+class ImportMDL2(ModalSteps, Operator, ImportHelper):
+    """Import MDL2 file from Ty1"""
+    bl_idname = "mdl.importer"  # important since its how bpy.ops.mdl.importer is constructed
+    bl_label = "Import MDL2"
+
+    # ImportHelper mixin class uses this
+    filename_ext = ".mdl"
+
+    filter_glob: StringProperty(
+        default="*.mdl",
+        options={'HIDDEN'},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+
+    # List of operator properties, the attributes will be assigned
+    # to the class instance from the operator settings before calling.
+    SmoothShading: BoolProperty(
+        name="Shade Smooth",
+        description="Apply smooth shading to the imported mesh",
+        default=True,
+    )
+    MergeSubOjects: BoolProperty(
+        name="Merge Sub Object Meshes",
+        description="Merges all meshes in a sub object into 1 mesh \n(Won't merge collision meshes)",
+        default=True,
+    )
+    ImportBoundingBox: BoolProperty(
+        name="Import Bounding Box",
+        description="Import the bounding box from the MDL data, some models use the bounding box for collision (mainly just the tilting platforms)",
+        default=False,
+    )
+    ImportAnimNodes: BoolProperty(
+        name="Import Anim Nodes",
+        description="Imports the animation nodes from animated models and stores skinning data in vertex groups.",
+        default=False,
+    )
+    ImportToMDLCollection: BoolProperty(
+        name="Import to MDL Collection",
+        description="Imports all the MDL Sub Objects into a collection with the same name as the MDL. Intended for use with the batch MDL export option",
+        default=False,
+    )
+    OriginEnum: EnumProperty(
+        name='Origin Position',
+        description='Which origin to use',
+        items=[('ORIGIN_GEOMETRY', 'Model Center', 'Use the center of the model as the origin (Usually gives nicer origin points, but may have some issues exporting certain models with a different origin point)'),
+               ('ORIGIN_CURSOR', 'MDL Origin', 'Use the origin from the MDL file (May be important for some models)')
+        ]
+    )
+    UseParseCache: BoolProperty(
+        name="Use Parse Cache",
+        description="Keeps the read MDL data in a cache on disk, so importing the same MDL again skips reading it",
+        default=True,
+    )
+    CollisionOnly: BoolProperty(
+        name="Collision Only",
+        description="Only imports the collision meshes, merged into 1 object for each collision type in a Collision collection (the render meshes aren't read at all)",
+        default=False,
+    )
+    ShareMeshData: BoolProperty(
+        name="Share Repeated Imports",
+        description="Importing a MDL that was already imported this session with the same options makes linked duplicates of its objects, sharing their meshes and materials instead of reading the strips and making new ones",
+        default=False,
+    )
+    ComponentFilter: StringProperty(
+        name="Components",
+        description="Only import the components with these names, comma separated (not case sensitive, * and ? wildcards work). Only the chosen components get decoded. Leave empty to import every component",
+        default='',
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        for propertyName in ('SmoothShading', 'MergeSubOjects', 'ImportBoundingBox', 'ImportAnimNodes', 'ImportToMDLCollection', 'OriginEnum', 'UseParseCache', 'CollisionOnly', 'ShareMeshData', 'ComponentFilter'):
+            layout.prop(self, propertyName)
+
+        #List the components of the selected MDL so the names for the filter can be picked from it
+        components = GetComponentList(self.filepath)
+        if (components == None or self.CollisionOnly):
+            return
+        componentPatterns = GetComponentPatterns(self.ComponentFilter)
+        box = layout.box()
+        box.label(text='Components:')
+        for componentName, meshCount, vertexCount in components:
+            chosen = len(componentPatterns) == 0 or MatchesPatterns(componentName, componentPatterns)
+            box.label(text='%s  (%d meshes, %d vertices)' % (componentName, meshCount, vertexCount), icon='CHECKBOX_HLT' if chosen else 'CHECKBOX_DEHLT')
+
+    def execute(self, context):
+        return self.StartSteps(context, CreateModelSteps(self, context, self.filepath, self.SmoothShading, self.MergeSubOjects, self.ImportBoundingBox, self.ImportAnimNodes, self.ImportToMDLCollection, self.OriginEnum, self.UseParseCache, self.CollisionOnly, self.ShareMeshData, self.ComponentFilter))
+
+#Component lists for the import panel, keyed by path with the size and modified time they were read at so redrawing doesn't read the file again
+ComponentListCache = {}
+
+#Returns (name, mesh count, vertex count) for each component, only the descriptors and strip headers get read. None if it isn't a valid MDL
+def GetComponentList(filepath):
+    if (not path.isfile(filepath)):
+        return None
+    stat = os.stat(filepath)
+    cached = ComponentListCache.get(filepath)
+    if (cached != None and cached[0] == (stat.st_size, stat.st_mtime_ns)):
+        return cached[1]
+
+    components = None
+    errors, _ = ValidateMDL(filepath)
+    if (len(errors) == 0):
+        #Read into locals, the reader classes could be in use by a import that is part way through
+        componentDescriptors, meshDescriptors = ReadDescriptors(filepath)
+        buffer = MapFile(filepath)
+        components = []
+        for component, meshes in zip(componentDescriptors, meshDescriptors):
+            vertexCount = sum(strip.VertexCount for mesh in meshes for strip in Strips.IterStrips(buffer, mesh.StripListOffset, mesh.StripListCount))
+            components.append((component.ComponentName, component.MeshCount, vertexCount))
+    ComponentListCache[filepath] = ((stat.st_size, stat.st_mtime_ns), components)
+    return components
+
+def GetComponentPatterns(componentFilter: str):
+    return tuple(pattern.strip().lower() for pattern in componentFilter.split(',') if pattern.strip() != '')
+
+def MatchesPatterns(componentName: str, componentPatterns):
+    return any(fnmatchcase(componentName.lower(), pattern) for pattern in componentPatterns)
+
+#Indices of the components the patterns pick out of the read component descriptors, None when there's no filter
+def MatchComponents(componentPatterns):
+    if (len(componentPatterns) == 0):
+        return None
+    return set(c for c, component in enumerate(ComponentDescriptor.Descriptors) if MatchesPatterns(component.ComponentName, componentPatterns))
+
+    
+def CreateModel(self, context, filepath, smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, originEnum, useParseCache, collisionOnly=False, shareMeshData=False, componentFilter=''):
+    return RunSteps(CreateModelSteps(self, context, filepath, smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, originEnum, useParseCache, collisionOnly, shareMeshData, componentFilter))
+
+#Same as CreateModel, in steps for the modal import (see modalSteps)
+def CreateModelSteps(self, context, filepath, smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, originEnum, useParseCache, collisionOnly=False, shareMeshData=False, componentFilter=''):
+
+    self.report({'INFO'}, 'Start Reading MDL')
+    #Check the offsets before reading anything so a broken MDL fails straight away
+    errors, warnings = ValidateMDL(filepath)
+    for warning in warnings:
+        print('Warning', warning)
+    if (len(errors) > 0):
+        for error in errors:
+            print('Error', error)
+        self.report({'ERROR'}, Path(filepath).name + ' is not a valid MDL (' + errors[0] + '), check the log for all the problems')
+        return {'CANCELLED'}
+
+    if (collisionOnly):
+        print("MDL:", Path(filepath).name)
+        startTime = time.time()
+        collisionMeshes = ReadCollision(filepath)
+        print('Read Collision Time (Sec):', (time.time() - startTime))
+        CreateBlenderMesh.CreateCollision(collisionMeshes, importToMDLCollection, Path(filepath).stem)
+        bpy.ops.ed.undo_push(message=('Import ' + Path(filepath).stem + ' Collision'))
+        return {'FINISHED'}
+
+    file = open(filepath, "rb")
+    animFile = None
+    #Both files get closed however the reading ends, including when it gets cancelled or fails part way through
+    try:
+        anim_filepath = filepath.replace(".mdl", ".anm")
+ 
+        if os.path.exists(anim_filepath) and importAnimNodes:
+            animFile = open(anim_filepath, "rb")
+        elif importAnimNodes:
+            print(anim_filepath + " is missing, unable to import anim nodes")
+            self.report({'WARNING'}, anim_filepath + " is missing, unable to import anim nodes")
+            #Reset it back to false
+            importAnimNodes = False
+        global FilePath
+        FilePath = filepath
+
+        print("MDL:", Path(filepath).name)
+
+        ImportTextureAlias()
+        componentPatterns = GetComponentPatterns(componentFilter)
+        componentIndices = None
+        sharedKey = None
+        sharedObjects = None
+        if (shareMeshData):
+            #Everything that changes the meshes that get made is part of the key
+            sharedKey = (GetSharedHash(filepath), smoothShading, mergeSubObjects, importAnimNodes, originEnum, componentPatterns)
+            sharedObjects = CreateBlenderMesh.GetSharedObjects(sharedKey)
+
+        if (sharedObjects != None):
+            #Every mesh will be a linked duplicate, so only the descriptors are needed
+            MDLHeader.GatherValues(file)
+            ComponentDescriptor.GatherValues(file)
+            RefPoints.Points = list()
+            if MDLHeader.RefPointCount != 0:
+                RefPoints.GatherValues(file)
+            MeshDescriptor.GatherValues(file)
+            Strips.Objects = list()
+        #Skip reading it if it was imported before and is still in the cache
+        elif not (useParseCache and ParseCache.Load(filepath)):
+            MDLHeader.GatherValues(file)
+            ComponentDescriptor.GatherValues(file)
+
+            if MDLHeader.RefPointCount != 0:
+                RefPoints.GatherValues(file)
+
+            MeshDescriptor.GatherValues(file)
+            #Only decode the strips of the chosen components
+            componentIndices = MatchComponents(componentPatterns)
+            yield from ScaleSteps(Strips.GatherValuesSteps(file, componentIndices), 0, 0.5)
+
+            #Only a whole MDL gets cached, a partial one would be missing components the next time it gets imported
+            if (useParseCache and componentIndices == None):
+                ParseCache.Store(filepath)
+
+        if (componentIndices == None):
+            componentIndices = MatchComponents(componentPatterns)
+        if (componentIndices != None and len(componentIndices) == 0):
+            self.report({'ERROR'}, 'None of the components in ' + Path(filepath).name + ' match "' + componentFilter + '"')
+            return {'CANCELLED'}
+
+        #Not cached since they come from the .anm file
+        if MDLHeader.AnimNodeCount != 0 and importAnimNodes:
+            AnimNodes.GatherValues(file, animFile)
+    finally:
+        file.close()
+        if (animFile != None):
+            animFile.close()
+
+    #Anything made before it got cancelled (or failed) gets removed again
+    existingData = GetDataPointers()
+    try:
+        yield from ScaleSteps(CreateBlenderMesh.CreateSteps(smoothShading, mergeSubObjects, importBoundingBox, importAnimNodes, importToMDLCollection, Path(filepath).stem, originEnum, sharedKey, sharedObjects, componentIndices), 0.5, 1)
+    except BaseException:
+        RemoveNewData(existingData)
+        raise
+
+    #Add a undo/redo restore point
+    #Makes it so undo doesn't act weirdly sometimes, and fixes the crash when trying to undo the import right after importing it
+    bpy.ops.ed.undo_push(message=('Import ' + Path(filepath).stem))
+    return {'FINISHED'}
+
+
+#The kinds of data blocks a import makes
+ImportDataTypes = ('objects', 'meshes', 'materials', 'images', 'collections')
+
+def GetDataPointers():
+    return dict((dataType, set(data.as_pointer() for data in getattr(bpy.data, dataType))) for dataType in ImportDataTypes)
+
+#Removes every data block made since the pointers were got
+def RemoveNewData(existingData):
+    newData = [data for dataType in ImportDataTypes for data in getattr(bpy.data, dataType) if data.as_pointer() not in existingData[dataType]]
+    bpy.data.batch_remove(newData)
+
+#Objects made by earlier imports this session, for making linked duplicates of them when the same MDL gets imported again
+#(content hash, options) -> {(component index, mesh index or -1 for the merged mesh): object name}
+SharedImports = {}
+
+#The shared imports are object names, they don't mean anything in a different blend file
+@persistent
+def ClearSharedImports(dummy):
+    SharedImports.clear()
+
+#realpath -> (size, modified time, content hash) of the MDLs imported with shared meshes this session
+SharedHashes = {}
+
+#Hash of the MDLs contents for the shared imports key, only hashing it again if its size or modified time changed
+#Kept separate from the parse cache's index so sharing meshes never reads or writes the cache
+def GetSharedHash(filepath):
+    filepath = path.realpath(filepath)
+    stat = os.stat(filepath)
+    hashEntry = SharedHashes.get(filepath)
+    if (hashEntry == None or hashEntry[0] != stat.st_size or hashEntry[1] != stat.st_mtime_ns):
+        hashEntry = (stat.st_size, stat.st_mtime_ns, ParseCache.HashFile(filepath))
+        SharedHashes[filepath] = hashEntry
+    return hashEntry[2]
+
+class CreateBlenderMesh:
+
+    #One step for each component
+    def CreateSteps(shadeSmooth: bool, mergeSubObjects: bool, importBoundingBox: bool, importAnimNodes: bool, importToMDLCollection: bool, mdlName: str, originEnum: EnumProperty, sharedKey=None, sharedObjects=None, componentIndices=None):
+        startTime = time.time()
+        #Make sure something is a active object otherwise will get a error
+        if bpy.context.active_object != None:
+            bpy.ops.object.mode_set(mode='OBJECT')
+        #Start with everything deselected so only the imported objects end up selected
+        bpy.ops.object.select_all(action='DESELECT')
+
+        if MDLHeader.AnimNodeCount > 0 and importAnimNodes:
+            #Create the collection for the nodes, check if the collection already exists for easier exporting
+            if ('Anim Nodes' not in bpy.data.collections):
+                nodesCollection = bpy.data.collections.new('Anim Nodes')
+                bpy.context.scene.collection.children.link(nodesCollection)
+            else:
+                nodesCollection = bpy.data.collections['Anim Nodes']
+
+            for node in AnimNodes.Nodes:
+                empty = bpy.data.objects.new(node.Name, None)
+                empty.location = Vector(node.Position).xzy
+                empty.scale = (0.05, 0.05, 0.05)
+                nodesCollection.objects.link(empty)
+
+        objectsToSelect = []
+
+        if importToMDLCollection:
+            mdlCollection = bpy.data.collections.new(mdlName)
+            bpy.context.scene.collection.children.link(mdlCollection)
+        else:
+            mdlCollection = bpy.context.scene.collection
+
+        #The objects made by this import, to be shared with the next import of it
+        createdObjects = {}
+        for components in range(MDLHeader.ComponentCount):
+            #Skip the components that weren't chosen, their strips weren't read
+            if (componentIndices != None and components not in componentIndices):
+                continue
+            componentName = ComponentDescriptor.Descriptors[components].ComponentName
+            modelCollection = bpy.data.collections.new(componentName)
+            mdlCollection.children.link(modelCollection)
+            #Meshes that get merged together into 1 mesh for the sub object
+            mergeMeshes = []
+            for meshes in range(ComponentDescriptor.Descriptors[components].MeshCount):
+                textureName = MeshDescriptor.Descriptors[components][meshes].TextureName
+
+                #Check if the texture if for a collision type
+                collisionType = CollisionTypes.GetCollisionType(textureName)
+                if (collisionType == None):
+                    collisionType = 'None'
+
+                #Collision meshes never get merged
+                if mergeSubObjects and collisionType == 'None':
+                    mergeMeshes.append(meshes)
+                    continue
+
+                object = CreateBlenderMesh.LinkedDuplicate(sharedObjects, (components, meshes), modelCollection)
+                if (object == None):
+                    meshData = Strips.Objects[components][meshes]
+                    materials = []
+                    #Only make the material if its not a collision material
+                    if (collisionType == 'None'):
+                        #Create and add the material
+                        material = GetMaterial(path.join(path.dirname(FilePath), "DDS"), textureName, meshData.TransparentVertexColour)
+                        if material:
+                            materials.append(material)
+
+                    object = CreateBlenderMesh.CreateObject(componentName, meshData, materials, collisionType, modelCollection, components, shadeSmooth, importAnimNodes, originEnum)
+                createdObjects[(components, meshes)] = object.name
+                objectsToSelect.append(object)
+            
+            if len(mergeMeshes) > 0:
+                object = CreateBlenderMesh.LinkedDuplicate(sharedObjects, (components, -1), modelCollection)
+                if (object == None):
+                    #Join the meshes on the decoded arrays instead of joining the blender objects
+                    meshData, materials = CreateBlenderMesh.MergeMeshes(components, mergeMeshes)
+                    object = CreateBlenderMesh.CreateObject(componentName, meshData, materials, 'None', modelCollection, components, shadeSmooth, importAnimNodes, originEnum)
+                createdObjects[(components, -1)] = object.name
+                objectsToSelect.append(object)
+            yield (components + 1) / MDLHeader.ComponentCount
+
+        if (sharedKey != None):
+            SharedImports[sharedKey] = createdObjects
+            
+        for obj in objectsToSelect:
+            obj.select_set(True)
+        if (len(objectsToSelect) > 0):
+            bpy.context.view_layer.objects.active = objectsToSelect[0]
+            
+
+
+        #Bounding box, used for frustum and occlusion culling (probably something different for levels) and collision for tilting platforms
+        if (importBoundingBox):
+            BoundingBox = bpy.data.objects.new('Bounding Box', None)
+            #Get the center of the bounding box
+            BoundingBox.location = Vector(MDLHeader.BoundingBoxStart + (MDLHeader.BoundingBoxStart + MDLHeader.BoundingBoxLength))/2
+            #Halve it as the scale is twice its length
+            BoundingBox.scale = Vector(MDLHeader.BoundingBoxLength)/2
+
+            bpy.context.scene.collection.objects.link(BoundingBox)
+
+            BoundingBox.empty_display_type = 'CUBE'
+
+
+        if (MDLHeader.RefPointCount > 0):
+            #Create the collection for the ref points, check if the collection already exists for easier exporting, unless its being imported into a MDL collection
+            if ('Ref Points' not in bpy.data.collections or importToMDLCollection):
+                refCollection = bpy.data.collections.new('Ref Points')
+                mdlCollection.children.link(refCollection)
+            else:
+                refCollection = bpy.data.collections['Ref Points']
+
+            #Create the empties for the ref points
+            for refPoint in RefPoints.Points:
+                empty = bpy.data.objects.new(refPoint.Name, None)
+                empty.location = Vector(refPoint.Position).xzy
+
+                refCollection.objects.link(empty)
+
+                #Some have the w value set to 0 (w is radius maybe?)
+                empty.empty_display_size = float(refPoint.Position[3]) if refPoint.Position[3] > 0.05 else 0.05
+                empty.empty_display_type = 'SPHERE'
+
+        print('Create Mesh Time (Sec):', (time.time() - startTime))
+        print('')#Padding Line to separate different imports or exports
+
+    #Returns the objects of the last import with the same key, None if there wasn't one or any of them got deleted or renamed since
+    def GetSharedObjects(sharedKey):
+        if (sharedKey not in SharedImports):
+            return None
+        sharedObjects = {}
+        for meshKey, objectName in SharedImports[sharedKey].items():
+            object = bpy.data.objects.get(objectName)
+            if (object == None or object.type != 'MESH'):
+                return None
+            sharedObjects[meshKey] = object
+        return sharedObjects
+
+    #Copies the shared object into the collection, the copy uses the same mesh (and its materials) like a linked duplicate
+    def LinkedDuplicate(sharedObjects, meshKey, modelCollection):
+        if (sharedObjects == None or meshKey not in sharedObjects):
+            return None
+        object = sharedObjects[meshKey].copy()
+        modelCollection.objects.link(object)
+        return object
+
+    #Creates 1 object for each collision type, in a Collision collection so it exports as its own sub object
+    def CreateCollision(collisionMeshes: dict, importToMDLCollection: bool, mdlName: str):
+        startTime = time.time()
+        if bpy.context.active_object != None:
+            bpy.ops.object.mode_set(mode='OBJECT')
+        bpy.ops.object.select_all(action='DESELECT')
+
+        if importToMDLCollection:
+            mdlCollection = bpy.data.collections.new(mdlName)
+            bpy.context.scene.collection.children.link(mdlCollection)
+        else:
+            mdlCollection = bpy.context.scene.collection
+        collisionCollection = bpy.data.collections.new('Collision')
+        mdlCollection.children.link(collisionCollection)
+
+        objectsToSelect = []
+        for collisionType, meshData in collisionMeshes.items():
+            #The types come from every sub object so the MDL origin of one of them doesn't make sense here
+            object = CreateBlenderMesh.CreateObject(collisionType, meshData, [], collisionType, collisionCollection, 0, False, False, 'ORIGIN_GEOMETRY')
+            objectsToSelect.append(object)
+
+        for obj in objectsToSelect:
+            obj.select_set(True)
+        if (len(objectsToSelect) > 0):
+            bpy.context.view_layer.objects.active = objectsToSelect[0]
+
+        print('Create Collision Time (Sec):', (time.time() - startTime))
+        print('')#Padding Line to separate different imports or exports
+
+    def CreateObject(name: str, meshData, materials: list, collisionType: str, modelCollection, componentIndex: int, shadeSmooth: bool, importAnimNodes: bool, originEnum: EnumProperty):
+        #Set the origin point to either the MDL origin or the center of the mesh (median of the vertices, same as origin_set used)
+        #by moving the vertices before the mesh gets made, instead of with the 3d cursor and origin_set
+        if (originEnum == 'ORIGIN_CURSOR'):
+            origin = np.array(ComponentDescriptor.Descriptors[componentIndex].Origin[[0, 2, 1]], dtype=np.float32)
+        elif (len(meshData.VertexPositions) > 0):
+            origin = meshData.VertexPositions.mean(axis=0, dtype=np.float64).astype(np.float32)
+        else:
+            origin = np.zeros(3, dtype=np.float32)
+
+        #Mesh
+        mesh = CreateBlenderMesh.NewMesh(name, meshData, origin)
+
+        #Shade smooth if the option is checked
+        if (shadeSmooth):
+            mesh.polygons.foreach_set('use_smooth', np.ones(len(mesh.polygons), dtype=bool))
+
+        #Create the object
+        object = bpy.data.objects.new(name, mesh)
+        object.location = origin.tolist()
+        
+        if MDLHeader.AnimNodeCount > 0 and importAnimNodes:
+            bone1List = meshData.Bone1.tolist()
+            bone2List = meshData.Bone2.tolist()
+            boneWeightList = meshData.BoneWeight.tolist()
+            for vert in range(len(boneWeightList)):
+                bone1Name = AnimNodes.NodeNames[bone1List[vert]]
+                bone2Name = AnimNodes.NodeNames[bone2List[vert]]
+                bone1Weight = boneWeightList[vert]
+                bone2Weight = 1 - bone1Weight
+                if bone1Name in object.vertex_groups:
+                    bone1_vertex_group = object.vertex_groups[bone1Name]
+                else:
+                    bone1_vertex_group = object.vertex_groups.new(name=bone1Name)
+                bone1_vertex_group.add([vert], bone1Weight, 'ADD')   
+                if bone2Name in object.vertex_groups:
+                    bone2_vertex_group = object.vertex_groups[bone2Name]
+                else:
+                    bone2_vertex_group = object.vertex_groups.new(name=bone2Name)
+                bone2_vertex_group.add([vert], bone2Weight, 'ADD')   
+
+        if (collisionType != 'None'):
+            if (collisionType in CollisionTypes.EnumCollisionIDs):
+                object.MDLCollisions.CollisionTypes = collisionType
+            #Ones from the custom collision table
+            else:
+                object.MDLCollisions.CollisionTypes = 'Custom'
+                object.MDLCollisions.CustomCollision = collisionType
+
+        for material in materials:
+            object.data.materials.append(material)
+        
+        modelCollection.objects.link(object)
+
+        return object
+
+    #Concatenates the welded arrays of the meshes in a sub object into 1 mesh, with each mesh's faces using its own material slot
+    def MergeMeshes(componentIndex: int, meshIndices: list):
+        mergedData = VertexData()
+        materials = []
+        meshList = []
+        faceMaterials = []
+        for m in meshIndices:
+            meshData = Strips.Objects[componentIndex][m]
+            meshList.append(meshData)
+
+            material = GetMaterial(path.join(path.dirname(FilePath), "DDS"), MeshDescriptor.Descriptors[componentIndex][m].TextureName, meshData.TransparentVertexColour)
+            #Same material gets the same slot, like joining the objects does
+            if material and material not in materials:
+                materials.append(material)
+            faceMaterials.append(np.full(len(meshData.Faces), materials.index(material) if material else 0, dtype=np.int32))
+
+            if meshData.TransparentVertexColour:
+                mergedData.TransparentVertexColour = True
+
+        vertexOffsets = np.cumsum([0] + [len(meshData.VertexPositions) for meshData in meshList])
+        mergedData.VertexPositions = np.concatenate([meshData.VertexPositions for meshData in meshList])
+        mergedData.Faces = np.concatenate([meshData.Faces + vertexOffsets[i] for i, meshData in enumerate(meshList)])
+        mergedData.Normals = np.concatenate([meshData.Normals for meshData in meshList])
+        mergedData.LoopUVs = np.concatenate([meshData.LoopUVs for meshData in meshList])
+        mergedData.LoopColours = np.concatenate([meshData.LoopColours for meshData in meshList])
+        mergedData.Bone1 = np.concatenate([meshData.Bone1 for meshData in meshList])
+        mergedData.Bone2 = np.concatenate([meshData.Bone2 for meshData in meshList])
+        mergedData.BoneWeight = np.concatenate([meshData.BoneWeight for meshData in meshList])
+        mergedData.MaterialIndices = np.concatenate(faceMaterials)
+
+        #Weld the vertices shared between the meshes
+        return Strips.WeldVertices(mergedData, WeldDistance), materials
+
+    #Creates the mesh straight from the welded arrays
+    def NewMesh(name: str, meshData, origin):
+        mesh = bpy.data.meshes.new(name)
+        vertexCount = len(meshData.VertexPositions)
+        faceCount = len(meshData.Faces)
+
+        mesh.vertices.add(vertexCount)
+        mesh.vertices.foreach_set('co', (meshData.VertexPositions - origin).ravel())
+        mesh.loops.add(faceCount * 3)
+        mesh.loops.foreach_set('vertex_index', meshData.Faces.ravel())
+        mesh.polygons.add(faceCount)
+        mesh.polygons.foreach_set('loop_start', np.arange(0, faceCount * 3, 3, dtype=np.int32))
+        #The loop total became read only when blender switched to face offsets
+        if not mesh.polygons.bl_rna.properties['loop_total'].is_readonly:
+            mesh.polygons.foreach_set('loop_total', np.full(faceCount, 3, dtype=np.int32))
+        if (len(meshData.MaterialIndices) == faceCount):
+            mesh.polygons.foreach_set('material_index', meshData.MaterialIndices)
+        mesh.update(calc_edges=True)
+
+        #UVs and vertex colours, and make sure they active
+        #The UV layer is always added since the exporter needs one, collision only meshes just don't have any values for it
+        mesh.uv_layers.active = mesh.uv_layers.new(name='UV')
+        if (len(meshData.LoopUVs) == faceCount * 3):
+            mesh.uv_layers.active.data.foreach_set('uv', meshData.LoopUVs.ravel())
+        if (len(meshData.LoopColours) == faceCount * 3):
+            mesh.vertex_colors.active = mesh.vertex_colors.new(name='Colour')
+            mesh.vertex_colors.active.data.foreach_set('color', meshData.LoopColours.ravel())
+
+        return mesh
+
+def GetMaterial(texturePath, textureName, transparentVertexColour):
+    if (textureName == ""):
+        print('Empty String')
+        return None
+    textureFound = True
+    #Use the original name instead of the name in the alias (if it has one), just because some are variants in global.mad, like no_grass ones
+    originalName = textureName
+
+    #Check if the material already exists
+    if (originalName in bpy.data.materials):
+        material = bpy.data.materials[originalName]
+        return material
+
+    #Check if the image doesn't exist
+    if (not Path(path.join("./", texturePath, textureName + '.dds')).is_file()):
+        aliasName = TextureAlias.get(textureName.lower())
+        #Check if it has a alias
+        if ((aliasName != None) and (Path(path.join("./", texturePath, aliasName + '.dds')).is_file())):
+            textureName = aliasName
+        #Check lowercase name
+        elif (Path(path.join("./", texturePath, textureName.lower() + '.dds')).is_file()):
+            textureName = textureName.lower()
+        else:
+            textureFound = False
+
+    textureHasAlpha = False
+    if (textureFound):
+        file = open(path.join("./", texturePath, textureName + '.dds'), "rb")
+        file.seek(84)
+        format = file.read(4)
+        #print('DDS DXT format:', format)
+        textureHasAlpha = format == b'DXT5'
+        #print(textureHasAlpha)
+        file.close()
+
+    #Copy the prebuilt node tree for this type of material instead of building it again
+    material = GetMaterialTemplate(textureFound, textureHasAlpha or transparentVertexColour).copy()
+    material.name = originalName
+
+    if (textureFound):
+        material.node_tree.nodes['Texture'].image = bpy.data.images.load(path.join("./", texturePath, textureName + '.dds'))
+        
+    return material
+
+#Builds (or gets if it was already built) the material that gets copied for each texture, textured/untextured and opaque/alpha each have their own template
+def GetMaterialTemplate(textureFound, hasAlpha):
+    #Starting the name with a . hides it from the material lists
+    templateName = '.MDL2 ' + ('Textured' if textureFound else 'Untextured') + (' Alpha' if hasAlpha else '')
+    #Rebuild it if it got removed (new file, purged, etc.)
+    if (templateName in bpy.data.materials):
+        return bpy.data.materials[templateName]
+
+    material = bpy.data.materials.new(name=templateName)
+    material.use_nodes = True
+    bsdf = material.node_tree.nodes['Principled BSDF']
+    texureImage = material.node_tree.nodes.new('ShaderNodeTexImage') if textureFound else material.node_tree.nodes.new('ShaderNodeRGB')
+    #So the image can be found again on the copies
+    texureImage.name = 'Texture'
+    #Just to have the material the same
+    if (not textureFound and hasAlpha):
+        placeholderAlpha = material.node_tree.nodes.new('ShaderNodeValue')
+        placeholderAlpha.outputs[0].default_value = 1.0
+    colourMultiply = material.node_tree.nodes.new('ShaderNodeMixRGB')
+    colourMultiply.blend_type = 'MULTIPLY'
+    colourMultiply.inputs['Fac'].default_value = 1.0
+    vertexColour = material.node_tree.nodes.new('ShaderNodeVertexColor')
+
+    if (not textureFound):
+        texureImage.outputs[0].default_value = (1, 1, 1, 1)
+    material.node_tree.links.new(colourMultiply.inputs['Color1'], texureImage.outputs['Color'])
+    material.node_tree.links.new(colourMultiply.inputs['Color2'], vertexColour.outputs['Color'])
+    material.node_tree.links.new(bsdf.inputs['Base Color'], colourMultiply.outputs['Color'])
+
+    #Check if the image has a alpha channel
+    if (hasAlpha):
+        #Set up the alpha
+        mathNode = material.node_tree.nodes.new('ShaderNodeMath')
+        mathNode.operation = 'MULTIPLY'
+        material.node_tree.links.new(mathNode.inputs[0], texureImage.outputs['Alpha'] if textureFound else placeholderAlpha.outputs[0])
+        material.node_tree.links.new(mathNode.inputs[1], vertexColour.outputs['Alpha'])
+        material.node_tree.links.new(bsdf.inputs['Alpha'], mathNode.outputs[0])
+        
+        material.blend_method = 'HASHED'
+        #This will cause a error in blender 4
+        if  bpy.app.version < (4, 0, 0):
+            material.shadow_method = 'HASHED'
+        
+    return material
@@ -0,0 +1,54 @@
+import time
+import bpy
+
+from .reader import RunSteps
+
+#Runs the import and export a chunk at a time on a timer so blender doesn't freeze, shows the progress on the cursor and can be cancelled with ESC
+#The work is steps like reader.RunSteps takes, closing the steps when cancelling is what rolls back anything they made so far
+
+#Seconds between the timer events
+TimerInterval = 0.01
+#How long each timer event keeps running steps before letting blender redraw
+ChunkTime = 0.1
+
+#Mixed into a operator, execute returns StartSteps with the steps and the operator result comes from what the steps return
+class ModalSteps:
+
+    def StartSteps(self, context, steps):
+        #Nothing to show the progress on or cancel it with in background mode, so just run it
+        if (bpy.app.background or context.window == None):
+            return RunSteps(steps)
+
+        self._steps = steps
+        windowManager = context.window_manager
+        self._timer = windowManager.event_timer_add(TimerInterval, window=context.window)
+        windowManager.progress_begin(0, 100)
+        windowManager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if (event.type == 'ESC' and event.value == 'PRESS'):
+            self.FinishSteps(context)
+            self._steps.close()
+            self.report({'WARNING'}, self.bl_label + ' cancelled')
+            return {'CANCELLED'}
+        #Every other event is blocked so the scene can't be changed part way through
+        if (event.type != 'TIMER'):
+            return {'RUNNING_MODAL'}
+
+        startTime = time.time()
+        try:
+            while (time.time() - startTime < ChunkTime):
+                progress = next(self._steps)
+        except StopIteration as stop:
+            self.FinishSteps(context)
+            return stop.value
+        except Exception:
+            self.FinishSteps(context)
+            raise
+        context.window_manager.progress_update(progress * 100)
+        return {'RUNNING_MODAL'}
+
+    def FinishSteps(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
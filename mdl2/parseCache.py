@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+
+from os import path
+from .reader import ReadMDL, MDLHeader, ComponentDescriptor, RefPoints, MeshDescriptor, Strips, ComponentData, RefPointData, MeshData, VertexData
+
+#On disk cache of the decoded and welded MDL data, so importing the same MDL again can skip reading it
+#Each entry is a flat binary file of all the arrays (memory mapped when loaded) and a json file with the descriptors and where each array is
+
+#Bump this when the decoded data or the layout changes so the old entries don't get used
+CacheVersion = 3
+CacheFolder = path.join(tempfile.gettempdir(), 'mdl2_cache')
+#Least recently used entries get removed once the cache is bigger than this (in bytes)
+MaxCacheSize = 512 * 1024 * 1024
+
+HeaderFields = ('ComponentCount', 'RefPointCount', 'AnimNodeCount', 'ComponentDescOffset', 'RefPointOffset', 'AnimNodeOffset', 'BoundingBoxStart', 'BoundingBoxLength', 'DictEntriesCount', 'DictOffset')
+ComponentFields = ('BoundingBoxStart', 'BoundingBoxLength', 'Origin', 'ComponentNameOffset', 'ComponentName', 'AnimIDOffset', 'AnimIDName', 'VboneCount', 'MeshCount', 'MeshDescOffset', 'MiscPtr')
+RefPointFields = ('Position', 'NameOffset', 'Name', 'Weight1', 'Weight2')
+MeshFields = ('TextureNameOffset', 'TextureName', 'StripListOffset', 'StripListCount')
+VertexFields = ('VertexPositions', 'Faces', 'Normals', 'LoopUVs', 'LoopColours', 'Bone1', 'Bone2', 'BoneWeight')
+#Fields that are stored as lists in the json but are arrays in the reader
+ArrayFields = ('BoundingBoxStart', 'BoundingBoxLength', 'Origin', 'Position')
+
+#Reads the MDL into the reader classes, using the cache if it has it
+def ReadMDLCached(filepath):
+    if (not Load(filepath)):
+        ReadMDL(filepath)
+        Store(filepath)
+
+#Gets the hash of the MDLs contents, only re-hashing it if its size or modified time changed since it was last hashed
+def GetContentHash(filepath):
+    filepath = path.realpath(filepath)
+    stat = os.stat(filepath)
+    index = ReadIndex()
+    indexEntry = index.get(filepath)
+    if (indexEntry != None and indexEntry[0] == stat.st_size and indexEntry[1] == stat.st_mtime_ns):
+        return indexEntry[2]
+
+    contentHash = 'v' + str(CacheVersion) + '_' + str(stat.st_size) + '_' + HashFile(filepath)
+    index[filepath] = [stat.st_size, stat.st_mtime_ns, contentHash]
+    WriteJson(path.join(CacheFolder, 'index.json'), index)
+    return contentHash
+
+#SHA-1 of the files contents, read a chunk at a time
+def HashFile(filepath):
+    contentHash = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            contentHash.update(chunk)
+    return contentHash.hexdigest()
+
+def ReadIndex():
+    try:
+        with open(path.join(CacheFolder, 'index.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+#Writes to a temp file first so other imports never see half written files
+def WriteJson(jsonPath, data):
+    os.makedirs(CacheFolder, exist_ok=True)
+    tempPath = jsonPath + '.' + str(os.getpid()) + '.tmp'
+    with open(tempPath, 'w') as file:
+        json.dump(data, file)
+    os.replace(tempPath, jsonPath)
+
+def Load(filepath):
+    entryPath = path.join(CacheFolder, GetContentHash(filepath))
+    if (not path.exists(entryPath + '.json')):
+        return False
+    #Everything gets read into locals first, the reader classes only get set once the whole entry read fine
+    try:
+        with open(entryPath + '.json') as file:
+            entry = json.load(file)
+        buffer = np.memmap(entryPath + '.bin', dtype=np.uint8, mode='r') if entry['Size'] > 0 else np.zeros(0, dtype=np.uint8)
+
+        header = CheckFields(entry['Header'], HeaderFields)
+        components = [SetFields(ComponentData(), CheckFields(fields, ComponentFields)) for fields in entry['Components']]
+        refPoints = [SetFields(RefPointData(), CheckFields(fields, RefPointFields)) for fields in entry['RefPoints']]
+        meshes = [[SetFields(MeshData(), CheckFields(fields, MeshFields)) for fields in componentMeshes] for componentMeshes in entry['Meshes']]
+        if (len(components) != header['ComponentCount'] or len(meshes) != len(components) or len(entry['Strips']) != len(components)):
+            raise ValueError('Cache entry counts don\'t match')
+
+        objects = list()
+        for componentStrips in entry['Strips']:
+            componentMeshes = list()
+            for arrays in componentStrips:
+                meshData = VertexData()
+                meshData.TransparentVertexColour = arrays['TransparentVertexColour']
+                for name in VertexFields:
+                    offset, dtype, shape = arrays[name]
+                    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                    if (offset < 0 or offset + size > len(buffer)):
+                        raise ValueError('Cache array is outside of the binary file')
+                    #A view straight into the memory mapped file, nothing gets copied
+                    setattr(meshData, name, buffer[offset:offset + size].view(dtype).reshape(shape))
+                componentMeshes.append(meshData)
+            objects.append(componentMeshes)
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        #A broken entry is a miss, remove it so it gets stored again (letting go of the memory map first so it can be deleted)
+        buffer = None
+        objects = None
+        RemoveEntry(entryPath)
+        return False
+
+    SetFields(MDLHeader, header)
+    ComponentDescriptor.Descriptors = components
+    RefPoints.Points = refPoints
+    MeshDescriptor.Descriptors = meshes
+    Strips.Objects = objects
+
+    #Mark it as recently used
+    os.utime(entryPath + '.json')
+    return True
+
+def RemoveEntry(entryPath):
+    for extension in ('.json', '.bin'):
+        try:
+            if path.exists(entryPath + extension):
+                os.remove(entryPath + extension)
+        except OSError:
+            #Still memory mapped by something, the json is gone so it won't get used
+            continue
+
+def Store(filepath):
+    entryName = GetContentHash(filepath)
+    entryPath = path.join(CacheFolder, entryName)
+
+    arrays = []
+    offset = 0
+    stripsEntry = []
+    for meshes in Strips.Objects:
+        componentMeshes = []
+        for meshData in meshes:
+            meshEntry = {'TransparentVertexColour': bool(meshData.TransparentVertexColour)}
+            for name in VertexFields:
+                array = np.ascontiguousarray(getattr(meshData, name))
+                #Keep every array 16 byte aligned
+                offset += -offset % 16
+                meshEntry[name] = [offset, array.dtype.str, list(array.shape)]
+                arrays.append((offset, array))
+                offset += array.nbytes
+            componentMeshes.append(meshEntry)
+        stripsEntry.append(componentMeshes)
+
+    entry = {
+        'Size': offset,
+        'Header': GetFields(MDLHeader, HeaderFields),
+        'Components': [GetFields(component, ComponentFields) for component in ComponentDescriptor.Descriptors],
+        'RefPoints': [GetFields(refPoint, RefPointFields) for refPoint in RefPoints.Points],
+        'Meshes': [[GetFields(mesh, MeshFields) for mesh in meshes] for meshes in MeshDescriptor.Descriptors],
+        'Strips': stripsEntry,
+    }
+
+    os.makedirs(CacheFolder, exist_ok=True)
+    tempPath = entryPath + '.bin.' + str(os.getpid()) + '.tmp'
+    with open(tempPath, 'wb') as file:
+        for arrayOffset, array in arrays:
+            file.write(bytes(arrayOffset - file.tell()))
+            file.write(array.tobytes())
+    try:
+        os.replace(tempPath, entryPath + '.bin')
+    except OSError:
+        #Another import has it memory mapped (windows won't replace it), the existing one is the same data anyway
+        os.remove(tempPath)
+    #Json last so a entry is only used once its binary file is there
+    WriteJson(entryPath + '.json', entry)
+
+    Evict(keep=entryName)
+
+#Removes the least recently used entries until the cache is under the max size
+def Evict(keep=''):
+    entries = []
+    totalSize = 0
+    for name in os.listdir(CacheFolder):
+        if (not name.endswith('.json') or name == 'index.json'):
+            continue
+        entryName = name[:-len('.json')]
+        entryPath = path.join(CacheFolder, entryName)
+        try:
+            size = os.path.getsize(entryPath + '.json') + (os.path.getsize(entryPath + '.bin') if path.exists(entryPath + '.bin') else 0)
+            entries.append((os.path.getmtime(entryPath + '.json'), entryName, size))
+        except OSError:
+            continue
+        totalSize += size
+
+    entries.sort()
+    for _, entryName, size in entries:
+        if (totalSize <= MaxCacheSize):
+            break
+        if (entryName == keep):
+            continue
+        try:
+            os.remove(path.join(CacheFolder, entryName + '.json'))
+            if path.exists(path.join(CacheFolder, entryName + '.bin')):
+                os.remove(path.join(CacheFolder, entryName + '.bin'))
+            totalSize -= size
+        except OSError:
+            #Still memory mapped by something, try again next time
+            continue
+
+def GetFields(source, fieldNames):
+    fields = {}
+    for name in fieldNames:
+        value = getattr(source, name)
+        fields[name] = value.tolist() if isinstance(value, np.ndarray) else value
+    return fields
+
+#Raises a KeyError if any of the fields are missing
+def CheckFields(fields, fieldNames):
+    for name in fieldNames:
+        if (name not in fields):
+            raise KeyError(name)
+    return fields
+
+def SetFields(target, fields):
+    for name, value in fields.items():
+        setattr(target, name, np.array(value, dtype=np.float32) if name in ArrayFields else value)
+    return target
@@ -0,0 +1,609 @@
+import os
+import struct
+import time
+import numpy as np
+
+from io import BufferedReader
+
+#Reads the MDL data without needing blender, used by the importer and the command line tools
+
+ModelScaleRatio = 100
+#Vertices closer than this get merged together
+WeldDistance = 0.005
+#Print how long each part of reading the strips took
+ShowTimings = True
+
+#Reads everything except the anim nodes (they need the .anm file), the results are left in the classes below like when importing
+def ReadMDL(filepath, readStrips: bool = True):
+    with open(filepath, "rb") as file:
+        MDLHeader.GatherValues(file)
+        ComponentDescriptor.GatherValues(file)
+
+        RefPoints.Points = list()
+        if MDLHeader.RefPointCount != 0:
+            RefPoints.GatherValues(file)
+
+        MeshDescriptor.GatherValues(file)
+        Strips.Objects = list()
+        if (readStrips):
+            Strips.GatherValues(file)
+
+
+#Returns the component descriptors and the mesh descriptors of each component, without setting the reader classes
+#For looking at a MDL (like listing its components) while a import might be part way through using them
+def ReadDescriptors(filepath):
+    with open(filepath, "rb") as file:
+        #Same places MDLHeader.GatherValues reads them from
+        file.seek(6)
+        componentCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
+        file.seek(12)
+        componentDescOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+        components = ComponentDescriptor.ReadDescriptors(file, componentDescOffset, componentCount)
+        return components, MeshDescriptor.ReadDescriptors(file, components)
+
+#Goes through every mesh in the MDL one at a time without decoding them, for scanning big MDLs without holding all of their vertices
+#The strips in each mesh are views into the memory mapped file, use Strips.DecodeStrips to decode them
+def IterMeshes(filepath):
+    ReadMDL(filepath, readStrips=False)
+    buffer = MapFile(filepath)
+    for c in range(MDLHeader.ComponentCount):
+        for m in range(ComponentDescriptor.Descriptors[c].MeshCount):
+            mesh = MeshView()
+            mesh.ComponentIndex = c
+            mesh.MeshIndex = m
+            mesh.Component = ComponentDescriptor.Descriptors[c]
+            mesh.Mesh = MeshDescriptor.Descriptors[c][m]
+            mesh.Strips = list(Strips.IterStrips(buffer, mesh.Mesh.StripListOffset, mesh.Mesh.StripListCount))
+            yield mesh
+
+#Runs work split into steps in one go, the steps are a generator that yields its progress (0 to 1) after each chunk of work and returns the result
+#Lets the same work be run a chunk at a time (like by the modal import and export) or all at once
+def RunSteps(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+#Runs steps as part of bigger steps, passing on its progress scaled to between start and end, use with yield from to get what it returns
+def ScaleSteps(steps, start: float, end: float):
+    try:
+        while True:
+            try:
+                progress = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            yield start + progress * (end - start)
+    finally:
+        #Stopping part way through stops the inner steps too
+        steps.close()
+
+#Memory maps the file as bytes (can't map a empty file)
+def MapFile(filepath):
+    if (os.path.getsize(filepath) == 0):
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(filepath, dtype=np.uint8, mode='r')
+
+
+class MDLHeader:
+    MDLName = ''
+
+    ComponentCount = 0
+    RefPointCount = 0
+    AnimNodeCount = 0
+    ComponentDescOffset = 0
+    RefPointOffset = 0
+    AnimNodeOffset = 0
+
+    #Already scaled down and in blenders axis order
+    BoundingBoxStart = np.zeros(3, dtype=np.float32)
+    BoundingBoxLength = np.zeros(3, dtype=np.float32)
+    DictEntriesCount = 0
+    DictOffset = 0
+
+    #Read the mdl header from the mdl file skipping over unneed data
+    def GatherValues(file: BufferedReader):
+        #MDL header
+        #Skip unneeded data for import
+        file.seek(6)
+
+        MDLHeader.ComponentCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
+        MDLHeader.RefPointCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
+        MDLHeader.AnimNodeCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
+        MDLHeader.ComponentDescOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+        MDLHeader.RefPointOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+        MDLHeader.AnimNodeOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+
+        #Seek past 2 unused ints (usually both 0)
+        file.seek(8, 1)
+        MDLHeader.BoundingBoxStart = (np.array(struct.unpack('fff', file.read(12)), dtype=np.float32)/ModelScaleRatio)[[0, 2, 1]]
+        #Skip the unused W value
+        file.seek(4, 1)
+        MDLHeader.BoundingBoxLength = (np.array(struct.unpack('fff', file.read(12)), dtype=np.float32)/ModelScaleRatio)[[0, 2, 1]]
+        #Skip the unused W value
+        file.seek(4, 1)
+
+        MDLHeader.DictEntriesCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
+        MDLHeader.DictOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+
+
+class AnimNodes:
+    Nodes = list()
+    NodeNames = []
+
+    def GatherValues(file: BufferedReader, anmFile: BufferedReader):
+        AnimNodes.Nodes = list()
+        AnimNodes.NodeNames = []
+        file.seek(MDLHeader.AnimNodeOffset, 0)
+
+        for n in range(MDLHeader.AnimNodeCount):
+            anmFile.seek(0x40 + 0x20 * n, 0)
+            AnimNodeInstance = AnimNodeData()
+            AnimNodes.Nodes.append(AnimNodeInstance)
+    
+            #Divide by 100 to scale down
+            AnimNodeInstance.Position = np.array(struct.unpack('ffff', file.read(16)), dtype=np.float32)/ModelScaleRatio
+            nodeNameOffset = int.from_bytes(anmFile.read(4), byteorder='little', signed=False)
+            anmFile.seek(nodeNameOffset, 0)
+            name = Strings.Read0EndedString(anmFile)
+            AnimNodeInstance.Name = name
+            print(name)
+            AnimNodes.NodeNames.append(name)
+
+
+
+class ComponentDescriptor:
+    Descriptors = list()
+
+    def GatherValues(file: BufferedReader):
+        ComponentDescriptor.Descriptors = ComponentDescriptor.ReadDescriptors(file, MDLHeader.ComponentDescOffset, MDLHeader.ComponentCount)
+
+    #Returns the descriptors instead of setting them, so reading them doesn't change what's already been read
+    def ReadDescriptors(file: BufferedReader, componentDescOffset: int, componentCount: int):
+        descriptors = list()
+        file.seek(componentDescOffset)
+        for x in range(componentCount):
+            DescriptorInstance = ComponentData()
+            descriptors.append(DescriptorInstance)
+
+            DescriptorInstance.BoundingBoxStart = (np.array(struct.unpack('fff', file.read(12)), dtype=np.float32)/ModelScaleRatio)[[0, 2, 1]]
+            #Skip the unused W value
+            file.seek(4, 1)
+            DescriptorInstance.BoundingBoxLength = (np.array(struct.unpack('fff', file.read(12)), dtype=np.float32)/ModelScaleRatio)[[0, 2, 1]]
+            #Skip the unused W value
+            file.seek(4, 1)
+            DescriptorInstance.Origin = np.array(struct.unpack('ffff', file.read(16)), dtype=np.float32)/ModelScaleRatio
+            DescriptorInstance.ComponentNameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+            DescriptorInstance.AnimIDOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+
+            #Unknown uint
+            file.seek(4, 1)
+            DescriptorInstance.VboneCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
+
+            #Renderer ID thing, not needed for importing
+            file.seek(2, 1)
+            DescriptorInstance.MeshCount = int.from_bytes(file.read(2), byteorder='little', signed=False)
+            DescriptorInstance.MeshDescOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+
+            #Unknown uint
+            file.seek(4, 1)
+            DescriptorInstance.MiscPtr = int.from_bytes(file.read(4), byteorder='little', signed=False)
+            
+            previousLocation = file.tell()
+            #Get the component name
+            file.seek(DescriptorInstance.ComponentNameOffset)
+            DescriptorInstance.ComponentName = Strings.Read0EndedString(file)
+
+            #Get the animation name
+            file.seek(DescriptorInstance.AnimIDOffset)
+            DescriptorInstance.AnimIDName = Strings.Read0EndedString(file)
+
+            #Jump back to previous location
+            file.seek(previousLocation)
+        return descriptors
+
+
+class RefPoints:
+    Points = list()
+
+    def GatherValues(file: BufferedReader):
+        RefPoints.Points = list()
+        file.seek(MDLHeader.RefPointOffset)
+
+        for x in range(MDLHeader.RefPointCount):
+            RefPointInstance = RefPointData()
+            RefPoints.Points.append(RefPointInstance)
+    
+            #Divide by 100 to scale down
+            RefPointInstance.Position = np.array(struct.unpack('ffff', file.read(16)), dtype=np.float32)/ModelScaleRatio
+
+            RefPointInstance.NameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+            #Seek past the unknown number that is usually 0
+            file.seek(4, 1)
+
+            RefPointInstance.Weight1 = struct.unpack('f', file.read(4))[0]
+            RefPointInstance.Weight2 = struct.unpack('f', file.read(4))[0]
+            
+            previousLocation = file.tell()
+            #Get the ref point name
+            file.seek(RefPointInstance.NameOffset)
+            RefPointInstance.Name = Strings.Read0EndedString(file)
+
+            #Jump back to previous location
+            file.seek(previousLocation)
+        
+class MeshDescriptor:
+    Descriptors = list()
+
+    def GatherValues(file: BufferedReader):
+        MeshDescriptor.Descriptors = MeshDescriptor.ReadDescriptors(file, ComponentDescriptor.Descriptors)
+
+    #Returns the mesh descriptors of each of the components, without setting them like ComponentDescriptor.ReadDescriptors
+    def ReadDescriptors(file: BufferedReader, componentDescriptors: list):
+        descriptors = list()
+
+        #Loop through every component
+        for component in componentDescriptors:
+            meshes = list()
+            #Seek to the mesh descriptor offset just for the odd cases like the pontoon
+            #where the mesh descriptors aren't one after another
+            file.seek(component.MeshDescOffset)
+
+            #Loop through all the meshes in that component
+            for i in range(component.MeshCount):
+                meshInstance = MeshData()
+                meshes.append(meshInstance)
+                meshInstance.TextureNameOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+                meshInstance.StripListOffset = int.from_bytes(file.read(4), byteorder='little', signed=False)
+                #Skip past the seemingly unused max offset? value
+                file.seek(4, 1)
+                meshInstance.StripListCount = int.from_bytes(file.read(4), byteorder='little', signed=False)
+                
+                previousLocation = file.tell()
+                #Get the texture name
+                file.seek(meshInstance.TextureNameOffset)
+                meshInstance.TextureName = Strings.Read0EndedString(file)
+
+                #Jump back to previous location
+                file.seek(previousLocation)
+            
+            descriptors.append(meshes)
+        return descriptors
+                
+class Strips:
+    Objects = list()
+
+    #Layout of the per vertex normal and UV blocks in a strip
+    NormalType = np.dtype([('Normal', 'i1', 3), ('Bone2', 'u1')])
+    UVType = np.dtype([('UV', '<i2', 2), ('BoneWeight', '<u2'), ('Bone1', '<u2')])
+
+    #Bytes before the vertex identifier in each strip
+    #3 unknown ints (ID?, 00 00 00 00 (00 00 00 14 for every one after the first strip), 00 80 02 6C), first int for a strip is unique then every one after is (FF FF 00 01)
+    #the vertex count, then 8 unknown ints (00 00 00 00, 00 00 00 00, 00 00 00 00 (sometimes 01 00 00 00), Unique, 00 40 3E 30, 12 04 00 00, 00 00 00 00, 04 01 00 01)
+    StripHeaderSize = 48
+    #Bytes per vertex (12 position, 4 normal and bone 2, 8 UV bone weight and bone 1, 4 colour), each block also has a 4 byte identifier before it
+    StripVertexSize = 28
+    StripIdentifiersSize = 16
+
+    #Only the components in componentIndices get decoded when it is given, the others are left as empty lists
+    def GatherValues(file: BufferedReader, componentIndices=None):
+        RunSteps(Strips.GatherValuesSteps(file, componentIndices))
+
+    #Same as GatherValues, one step for each component
+    def GatherValuesSteps(file: BufferedReader, componentIndices=None):
+        Strips.Objects = list()
+        startTime = time.time()
+        decodeTime = 0.0
+        weldTime = 0.0
+
+        buffer = MapFile(file.name)
+        #Loop through every component
+        for c in range(MDLHeader.ComponentCount):
+            meshes = list()
+            if (componentIndices != None and c not in componentIndices):
+                Strips.Objects.append(meshes)
+                yield (c + 1) / MDLHeader.ComponentCount
+                continue
+            #Loop through all the meshes in that component, the mesh descriptors point straight at their strips
+            for m in range(ComponentDescriptor.Descriptors[c].MeshCount):
+                meshDescriptor = MeshDescriptor.Descriptors[c][m]
+                stripsData = Strips.DecodeStrips(list(Strips.IterStrips(buffer, meshDescriptor.StripListOffset, meshDescriptor.StripListCount)))
+                decodeTime += time.time() - startTime
+                #reset the start time for the next part
+                startTime = time.time()
+
+                #Merge the duplicate vertices from the strips before any blender mesh is made
+                meshes.append(Strips.WeldVertices(stripsData, WeldDistance))
+                weldTime += time.time() - startTime
+                #reset the start time for the next part
+                startTime = time.time()
+
+            Strips.Objects.append(meshes)
+            yield (c + 1) / MDLHeader.ComponentCount
+            #Don't count the time between the steps
+            startTime = time.time()
+
+        if (ShowTimings):
+            print('Decode Time (Sec):', decodeTime)
+            print('Weld Time (Sec):', weldTime)
+            print('Gather Values Total Time (Sec):', (decodeTime + weldTime))
+
+    #Goes through the strips starting at the offset one at a time, each one is just views into the buffer so nothing gets copied
+    def IterStrips(buffer, offset: int, stripCount: int):
+        for s in range(stripCount):
+            if (offset + Strips.StripHeaderSize > len(buffer)):
+                raise ValueError('Strip at 0x%X is past the end of the file' % offset)
+            vertexCount = int(buffer[offset + 12:offset + 16].view('<u4')[0])
+            stripEnd = offset + Strips.StripHeaderSize + Strips.StripIdentifiersSize + Strips.StripVertexSize * vertexCount
+            if (stripEnd > len(buffer)):
+                raise ValueError('Strip at 0x%X with %d vertices goes past the end of the file' % (offset, vertexCount))
+
+            strip = StripView()
+            strip.Offset = offset
+            strip.VertexCount = vertexCount
+            #Skip past the header and vertex identifier
+            blockStart = offset + Strips.StripHeaderSize + 4
+            strip.Positions = buffer[blockStart:blockStart + 12 * vertexCount].view('<f4').reshape(-1, 3)
+            #Skip past the normal identifier
+            blockStart += 12 * vertexCount + 4
+            strip.Normals = buffer[blockStart:blockStart + 4 * vertexCount].view(Strips.NormalType)
+            #Skip past the UV identifier
+            blockStart += 4 * vertexCount + 4
+            strip.UVs = buffer[blockStart:blockStart + 8 * vertexCount].view(Strips.UVType)
+            #Skip past the colour identifier
+            blockStart += 8 * vertexCount + 4
+            strip.Colours = buffer[blockStart:blockStart + 4 * vertexCount].reshape(-1, 4)
+
+            yield strip
+            offset = stripEnd
+
+    #Decodes the strips of a mesh into one set of vertices and faces (not welded)
+    #Geometry only just decodes the positions, normals and faces, for collision meshes
+    def DecodeStrips(strips: list, geometryOnly: bool = False):
+        faces = []
+        vertexID = 0
+        for strip in strips:
+            #Face list for the strip, using the index in the whole mesh
+            faces.append(Strips.StripFaces(strip.VertexCount) + vertexID)
+            vertexID += strip.VertexCount
+        if (geometryOnly):
+            return Strips.DecodeVertexData([strip.Positions for strip in strips], [strip.Normals for strip in strips], None, None, faces)
+        return Strips.DecodeVertexData([strip.Positions for strip in strips], [strip.Normals for strip in strips], [strip.UVs for strip in strips], [strip.Colours for strip in strips], faces)
+
+    #Converts the raw strip values into blenders scale and axis order, and fixes the face winding
+    #The UVs (with the skinning values) and colours are skipped when they are None
+    def DecodeVertexData(positions: list, normals: list, uvs: list, colours: list, faces: list):
+        stripsData = VertexData()
+        rawNormals = np.concatenate(normals) if normals else np.zeros(0, dtype=Strips.NormalType)
+
+        #Divide to scale the mesh down to a better size with blenders units, and swap the y and z
+        stripsData.VertexPositions = (np.concatenate(positions) if positions else np.zeros((0, 3), dtype=np.float32))[:, [0, 2, 1]] / np.float32(ModelScaleRatio)
+
+        vertexNormals = rawNormals['Normal'][:, [0, 2, 1]].astype(np.float32) / 127
+        normalLengths = np.linalg.norm(vertexNormals, axis=1, keepdims=True)
+        stripsData.Normals = np.divide(vertexNormals, normalLengths, out=np.zeros_like(vertexNormals), where=normalLengths > 0)
+
+        if (uvs != None):
+            rawUVs = np.concatenate(uvs) if uvs else np.zeros(0, dtype=Strips.UVType)
+            stripsData.Bone2 = ((rawNormals['Bone2'] >> 1).astype(np.int8) - 1)
+            UVs = rawUVs['UV'].astype(np.float32) / 4096
+            #UVs are inverted vertically so 1 - the vector to invert it, eg. 0 becomes 1, 1 become 0, 0.25 becomes 0.75
+            UVs[:, 1] = 1 - UVs[:, 1]
+            stripsData.UVs = UVs
+            stripsData.BoneWeight = rawUVs['BoneWeight'].astype(np.float32) / 4096
+            stripsData.Bone1 = ((rawUVs['Bone1'] >> 2).astype(np.int16) - 1)
+
+        if (colours != None):
+            stripsData.VertexColours = Strips.DecodeColours(np.concatenate(colours) if colours else np.zeros((0, 4), dtype=np.uint8))
+            stripsData.TransparentVertexColour = bool((stripsData.VertexColours[:, 3] < 1).any())
+
+        faceIDs = np.concatenate(faces) if faces else np.zeros((0, 3), dtype=np.int32)
+        if (len(faceIDs) > 0):
+            #Flip the faces where the winding doesn't match the direction of the stored normals
+            vertexPositions = stripsData.VertexPositions
+            computedNormals = np.cross(vertexPositions[faceIDs[:, 1]] - vertexPositions[faceIDs[:, 0]], vertexPositions[faceIDs[:, 2]] - vertexPositions[faceIDs[:, 0]])
+            actualNormals = stripsData.Normals[faceIDs].sum(axis=1)
+            flipped = (computedNormals * actualNormals).sum(axis=1) < 0.0
+            faceIDs[flipped] = faceIDs[flipped][:, ::-1]
+        stripsData.Faces = faceIDs
+        return stripsData
+
+    #Triangles for a strip with the vertex count, the vertices in each face are ordered by their strip index % 3
+    def StripFaces(vertexCount: int):
+        if (vertexCount < 3):
+            return np.zeros((0, 3), dtype=np.int32)
+        lastIDs = np.arange(2, vertexCount, dtype=np.int32)
+        faceIDs = np.stack((lastIDs - 2, lastIDs - 1, lastIDs), axis=1)
+        return np.take_along_axis(faceIDs, np.argsort(faceIDs % 3, axis=1), axis=1)
+
+    #Converts each colour channel from the 0-255 range with 0x80 as full
+    def DecodeColours(colours):
+        colours = colours.astype(np.float32)
+        decoded = np.where(colours <= 0x80, 2 * colours - 1, (colours - 1) * 2) / 255
+        #0 stays as 0
+        decoded[colours == 0] = 0
+        return decoded
+
+    #Strips repeat the vertices at every strip boundary and shared edge, this merges them on the decoded arrays
+    #Only the position is used to merge them (same as remove doubles did), the UVs and colours are kept per face corner so the UV seams stay intact
+    def WeldVertices(stripsData, distance: float):
+        positions = np.asarray(stripsData.VertexPositions, dtype=np.float32).reshape(-1, 3)
+        faces = np.asarray(stripsData.Faces, dtype=np.int32).reshape(-1, 3)
+        uvs = np.asarray(stripsData.UVs, dtype=np.float32).reshape(-1, 2)
+        colours = np.asarray(stripsData.VertexColours, dtype=np.float32).reshape(-1, 4)
+
+        weldedData = VertexData()
+        weldedData.TransparentVertexColour = stripsData.TransparentVertexColour
+
+        #Snap the positions to the tolerance grid so the ones within the distance end up with the same key
+        gridPositions = np.floor(positions / distance + 0.5).astype(np.int64)
+        if (len(gridPositions) > 0):
+            _, firstIndices, remap = np.unique(gridPositions, axis=0, return_index=True, return_inverse=True)
+            remap = remap.ravel()
+        else:
+            firstIndices = np.zeros(0, dtype=np.int64)
+            remap = np.zeros(0, dtype=np.int64)
+        #Keep the vertices in the order they first appeared in instead of the sorted order unique gives
+        order = np.argsort(firstIndices)
+        newIndices = np.empty_like(order)
+        newIndices[order] = np.arange(len(order))
+        keptIndices = firstIndices[order]
+
+        weldedFaces = newIndices[remap[faces]] if len(faces) > 0 else faces
+        #Drop the faces that collapsed into a line or point after welding (degenerate strip triangles)
+        validFaces = (weldedFaces[:, 0] != weldedFaces[:, 1]) & (weldedFaces[:, 1] != weldedFaces[:, 2]) & (weldedFaces[:, 0] != weldedFaces[:, 2])
+
+        weldedData.VertexPositions = positions[keptIndices]
+        weldedData.Faces = weldedFaces[validFaces].astype(np.int32)
+        weldedData.Normals = np.asarray(stripsData.Normals, dtype=np.float32).reshape(-1, 3)[keptIndices]
+
+        #Already welded data (merged meshes) has its own face corner data, otherwise get it from the vertices
+        #Geometry only data (collision) has neither so there is nothing to keep
+        if (len(stripsData.LoopUVs) == len(faces) * 3):
+            weldedData.LoopUVs = np.asarray(stripsData.LoopUVs, dtype=np.float32).reshape(-1, 3, 2)[validFaces].reshape(-1, 2)
+            weldedData.LoopColours = np.asarray(stripsData.LoopColours, dtype=np.float32).reshape(-1, 3, 4)[validFaces].reshape(-1, 4)
+        elif (len(uvs) == len(positions)):
+            weldedData.LoopUVs = uvs[faces][validFaces].reshape(-1, 2)
+            weldedData.LoopColours = colours[faces][validFaces].reshape(-1, 4)
+        if (len(stripsData.MaterialIndices) == len(faces)):
+            weldedData.MaterialIndices = np.asarray(stripsData.MaterialIndices, dtype=np.int32)[validFaces]
+        if (len(stripsData.BoneWeight) == len(positions)):
+            weldedData.Bone1 = np.asarray(stripsData.Bone1, dtype=np.int16)[keptIndices]
+            weldedData.Bone2 = np.asarray(stripsData.Bone2, dtype=np.int8)[keptIndices]
+            weldedData.BoneWeight = np.asarray(stripsData.BoneWeight, dtype=np.float32)[keptIndices]
+        return weldedData
+
+
+class Strings:
+
+    def Read0EndedString(file: BufferedReader):
+        startOffset = file.tell()
+        #Sometimes some models have a sting offset that is past the end of the file
+        if (startOffset >= os.fstat(file.fileno()).st_size):
+            #Discard the string and just assume its bad
+            return ''
+
+        resultBytes = b''
+        #Read in chunks until the 0 at the end of the string is found
+        while (True):
+            chunk = file.read(64)
+            #Got to the end of the file without finding the end of the string, also assume its bad
+            if (len(chunk) == 0):
+                return ''
+            endIndex = chunk.find(b'\x00')
+            if (endIndex != -1):
+                resultBytes += chunk[:endIndex]
+                break
+            resultBytes += chunk
+
+        #Leave the file just past the 0 like reading it 1 byte at a time did
+        file.seek(startOffset + len(resultBytes) + 1)
+        return resultBytes.decode('utf-8')
+
+    #Reads all the strings in the string dictionary at the end of the MDL
+    def ReadDictionary(file: BufferedReader):
+        strings = []
+        file.seek(MDLHeader.DictOffset)
+        for d in range(MDLHeader.DictEntriesCount):
+            strings.append(Strings.Read0EndedString(file))
+        return strings
+
+
+
+
+#The records use __slots__ so big levels with thousands of them don't each carry a __dict__
+class ComponentData:
+    __slots__ = ('BoundingBoxStart', 'BoundingBoxLength', 'Origin', 'ComponentNameOffset', 'ComponentName', 'AnimIDOffset', 'AnimIDName', 'VboneCount', 'MeshCount', 'MeshDescOffset', 'MiscPtr')
+
+    def __init__(self):
+        #Seemingly unused by the game, read so the diff can compare it
+        self.BoundingBoxStart = np.zeros(3, dtype=np.float32)
+        self.BoundingBoxLength = np.zeros(3, dtype=np.float32)
+        self.Origin = np.zeros(4, dtype=np.float32)
+        self.ComponentNameOffset = 0
+        self.ComponentName = ''
+        self.AnimIDOffset = 0
+        #Blank if no ID
+        self.AnimIDName = ''
+        self.VboneCount = 0
+        self.MeshCount = 0
+        self.MeshDescOffset = 0
+        self.MiscPtr = 0
+
+class AnimNodeData:
+    __slots__ = ('Position', 'Name')
+
+    def __init__(self):
+        self.Position = np.zeros(4, dtype=np.float32)
+        self.Name = "Node"
+
+class RefPointData:
+    __slots__ = ('Position', 'NameOffset', 'Name', 'Weight1', 'Weight2')
+
+    def __init__(self):
+        self.Position = np.zeros(4, dtype=np.float32)
+        self.NameOffset = 0
+        self.Name = ''
+        self.Weight1 = 0.0
+        self.Weight2 = 0.0
+
+class MeshData:
+    __slots__ = ('TextureNameOffset', 'TextureName', 'StripListOffset', 'StripListCount')
+
+    def __init__(self):
+        self.TextureNameOffset = 0
+        self.TextureName = ''
+        self.StripListOffset = 0
+        self.StripListCount = 0
+
+#Struct of arrays for a mesh, every field is a numpy array with one row per vertex, face or face corner
+class VertexData:
+    __slots__ = ('VertexPositions', 'Faces', 'Normals', 'Bone2', 'UVs', 'BoneWeight', 'Bone1', 'VertexColours', 'TransparentVertexColour', 'LoopUVs', 'LoopColours', 'MaterialIndices')
+
+    def __init__(self):
+        self.VertexPositions = np.zeros((0, 3), dtype=np.float32)
+
+        #Vertex index in the vertex position list
+        self.Faces = np.zeros((0, 3), dtype=np.int32)
+
+        self.Normals = np.zeros((0, 3), dtype=np.float32)
+        self.Bone2 = np.zeros(0, dtype=np.int8)
+
+        #Per vertex UVs and colours are only kept until welding, after that only the face corner ones are
+        self.UVs = np.zeros((0, 2), dtype=np.float32)
+        self.BoneWeight = np.zeros(0, dtype=np.float32)
+        self.Bone1 = np.zeros(0, dtype=np.int16)
+
+        self.VertexColours = np.zeros((0, 4), dtype=np.float32)
+        self.TransparentVertexColour = False
+
+        #UVs and colours for each face corner, in the same order as the flattened faces (filled in when welding)
+        self.LoopUVs = np.zeros((0, 2), dtype=np.float32)
+        self.LoopColours = np.zeros((0, 4), dtype=np.float32)
+        #Material slot for each face, only used for merged meshes
+        self.MaterialIndices = np.zeros(0, dtype=np.int32)
+
+#One strip in the file, the arrays are the raw values
+class StripView:
+    __slots__ = ('Offset', 'VertexCount', 'Positions', 'Normals', 'UVs', 'Colours')
+
+    def __init__(self):
+        self.Offset = 0
+        self.VertexCount = 0
+        self.Positions = None
+        #Normal and Bone2
+        self.Normals = None
+        #UV, BoneWeight and Bone1
+        self.UVs = None
+        self.Colours = None
+
+#One mesh in the file with its strips
+class MeshView:
+    __slots__ = ('ComponentIndex', 'MeshIndex', 'Component', 'Mesh', 'Strips')
+
+    def __init__(self):
+        self.ComponentIndex = 0
+        self.MeshIndex = 0
+        self.Component = None
+        self.Mesh = None
+        self.Strips = []
@@ -0,0 +1,110 @@
+import struct
+
+from .reader import MapFile, Strips
+
+#Checks every offset, count and strip length in a MDL against the file size before anything gets decoded
+#Goes through the file once in order, so a corrupt MDL fails straight away instead of the reader looping or allocating huge arrays
+#Problems are strings starting with the offset of the bad value, errors mean it can't be read and warnings are things the reader works around
+
+#Bytes of the header that get read (up to the dictionary offset)
+HeaderSize = 72
+ComponentDescSize = 80
+RefPointSize = 32
+AnimNodeSize = 16
+MeshDescSize = 16
+#Strings longer than this without a 0 at the end are treated as having no end
+MaxStringLength = 4096
+
+#Identifier before each block of vertex data in a strip, with the bytes per vertex of the block before it
+StripIdentifiers = ((0, b'\x02\x80\x08\x68'), (12, b'\x03\x80\x08\x6E'), (4, b'\x04\x80\x08\x6D'), (8, b'\x05\xC0\x08\x6E'))
+
+#Returns (errors, warnings)
+def ValidateMDL(filepath):
+    errors = []
+    warnings = []
+    buffer = MapFile(filepath)
+    fileSize = len(buffer)
+
+    if (fileSize < HeaderSize):
+        AddProblem(errors, 0, 'File is %d bytes, too small for the %d byte header' % (fileSize, HeaderSize))
+        return errors, warnings
+
+    componentCount, refPointCount, animNodeCount, componentDescOffset, refPointOffset, animNodeOffset = struct.unpack_from('<HHHIII', buffer, 6)
+    dictEntriesCount, dictOffset = struct.unpack_from('<II', buffer, 64)
+
+    #Sections with a count and a fixed size for each entry, stored count and offset are at the header offsets
+    if (not CheckSection(errors, 0x0C, componentDescOffset, componentCount, ComponentDescSize, fileSize, 'Component descriptors')):
+        #Nothing else can be found without them
+        return errors, warnings
+    if (refPointCount > 0):
+        CheckSection(errors, 0x10, refPointOffset, refPointCount, RefPointSize, fileSize, 'Ref points')
+    if (animNodeCount > 0):
+        CheckSection(errors, 0x14, animNodeOffset, animNodeCount, AnimNodeSize, fileSize, 'Anim nodes')
+    if (dictEntriesCount > 0 and dictOffset >= fileSize):
+        AddProblem(warnings, 0x44, 'Dictionary offset 0x%X with %d entries is past the end of the file' % (dictOffset, dictEntriesCount))
+
+    for c in range(componentCount):
+        descOffset = componentDescOffset + ComponentDescSize * c
+        nameOffset, animIDOffset = struct.unpack_from('<II', buffer, descOffset + 48)
+        meshCount, meshDescOffset = struct.unpack_from('<HI', buffer, descOffset + 66)
+        CheckString(warnings, buffer, descOffset + 48, nameOffset, 'Component %d name' % c)
+        CheckString(warnings, buffer, descOffset + 52, animIDOffset, 'Component %d anim ID' % c)
+
+        if (not CheckSection(errors, descOffset + 68, meshDescOffset, meshCount, MeshDescSize, fileSize, 'Component %d mesh descriptors' % c)):
+            continue
+        for m in range(meshCount):
+            meshOffset = meshDescOffset + MeshDescSize * m
+            textureNameOffset, stripListOffset, _, stripListCount = struct.unpack_from('<IIII', buffer, meshOffset)
+            CheckString(warnings, buffer, meshOffset, textureNameOffset, 'Component %d mesh %d texture name' % (c, m))
+            CheckStrips(errors, warnings, buffer, meshOffset + 4, stripListOffset, stripListCount, 'Component %d mesh %d' % (c, m))
+
+    if (refPointCount > 0 and refPointOffset + RefPointSize * refPointCount <= fileSize):
+        for r in range(refPointCount):
+            pointOffset = refPointOffset + RefPointSize * r
+            CheckString(warnings, buffer, pointOffset + 16, struct.unpack_from('<I', buffer, pointOffset + 16)[0], 'Ref point %d name' % r)
+
+    return errors, warnings
+
+def AddProblem(problems: list, offset: int, message: str):
+    problems.append('0x%08X: %s' % (offset, message))
+
+#Checks a table of count entries of entrySize bytes starting at offset fits in the file
+def CheckSection(errors: list, fieldOffset: int, offset: int, count: int, entrySize: int, fileSize: int, name: str):
+    if (count > 0 and offset < HeaderSize):
+        AddProblem(errors, fieldOffset, '%s offset 0x%X is inside the header' % (name, offset))
+        return False
+    if (offset + count * entrySize > fileSize):
+        AddProblem(errors, fieldOffset, '%s at 0x%X (%d x %d bytes) go past the end of the file (%d bytes)' % (name, offset, count, entrySize, fileSize))
+        return False
+    return True
+
+#Some models have string offsets past the end of the file, the reader reads those as blank so they are only warnings
+def CheckString(warnings: list, buffer, fieldOffset: int, offset: int, name: str):
+    if (offset >= len(buffer)):
+        AddProblem(warnings, fieldOffset, '%s offset 0x%X is past the end of the file' % (name, offset))
+    elif (bytes(buffer[offset:offset + MaxStringLength]).find(b'\x00') == -1):
+        AddProblem(warnings, fieldOffset, '%s at 0x%X has no 0 at the end' % (name, offset))
+
+def CheckStrips(errors: list, warnings: list, buffer, fieldOffset: int, offset: int, stripCount: int, name: str):
+    fileSize = len(buffer)
+    if (stripCount > 0 and offset < HeaderSize):
+        AddProblem(errors, fieldOffset, '%s strip offset 0x%X is inside the header' % (name, offset))
+        return
+    for s in range(stripCount):
+        if (offset + Strips.StripHeaderSize > fileSize):
+            AddProblem(errors, offset, '%s strip %d of %d starts past the end of the file' % (name, s, stripCount))
+            return
+        vertexCount = struct.unpack_from('<I', buffer, offset + 12)[0]
+        stripEnd = offset + Strips.StripHeaderSize + Strips.StripIdentifiersSize + Strips.StripVertexSize * vertexCount
+        if (stripEnd > fileSize):
+            AddProblem(errors, offset + 12, '%s strip %d has %d vertices which goes past the end of the file' % (name, s, vertexCount))
+            return
+
+        #The identifiers not matching means the strip layout isn't what the reader expects
+        identifierOffset = offset + Strips.StripHeaderSize - 4
+        for blockSize, identifier in StripIdentifiers:
+            identifierOffset += 4 + blockSize * vertexCount
+            if (bytes(buffer[identifierOffset:identifierOffset + 4]) != identifier):
+                AddProblem(warnings, identifierOffset, '%s strip %d block identifier is %s instead of %s' % (name, s, bytes(buffer[identifierOffset:identifierOffset + 4]).hex(' ').upper(), identifier.hex(' ').upper()))
+                break
+        offset = stripEnd
@@ -0,0 +1,128 @@
+import numpy as np
+
+from . import reader
+from .reader import MDLHeader, Strips, Strings, IterMeshes
+from .validator import ValidateMDL
+
+#Checks a exported MDL by reading it back with the importers reading code and comparing it against what the exporter wrote
+#The exporter fills in a ExportRecord while writing, all the values in it are the scene values before they got encoded (blender units, Z up)
+
+#How far the read back values can be from the scene values, each is about the precision the value gets stored with
+PositionTolerance = 1e-4
+NormalTolerance = 0.03
+UVTolerance = 2 / 4096
+ColourTolerance = 3 / 255
+WeightTolerance = 1 / 4096
+#UVs get clamped to a short when exported
+UVRange = (-32768 / 4096, 32767 / 4096)
+#Only the first few mismatches of each kind get listed
+MaxListedVertices = 3
+
+class ExportRecord:
+    __slots__ = ('ComponentDescOffset', 'RefPointOffset', 'AnimNodeOffset', 'DictOffset', 'DictEntriesCount', 'ComponentCount', 'Meshes')
+
+    def __init__(self):
+        self.ComponentDescOffset = 0
+        self.RefPointOffset = 0
+        self.AnimNodeOffset = 0
+        self.DictOffset = 0
+        self.DictEntriesCount = 0
+        self.ComponentCount = 0
+        #Every mesh in the order they were written
+        self.Meshes = []
+
+class ExportedMesh:
+    __slots__ = ('Name', 'TriangleCount', 'StripLengths', 'Positions', 'Normals', 'UVs', 'Colours', 'BoneWeights', 'Bone1', 'Bone2')
+
+    def __init__(self, name: str = ''):
+        self.Name = name
+        self.TriangleCount = 0
+        self.StripLengths = []
+        #One entry per strip vertex in the order they were written, turned into arrays when verifying
+        self.Positions = []
+        self.Normals = []
+        self.UVs = []
+        self.Colours = []
+        self.BoneWeights = []
+        self.Bone1 = []
+        self.Bone2 = []
+
+#Returns a list of the mismatches, empty if the file matches
+def VerifyExport(filepath, record: ExportRecord):
+    problems = []
+    errors, _ = ValidateMDL(filepath)
+    if (len(errors) > 0):
+        return ['Written file is not a valid MDL: ' + error for error in errors]
+
+    showTimings = reader.ShowTimings
+    reader.ShowTimings = False
+    try:
+        writtenMeshes = list(IterMeshes(filepath))
+        with open(filepath, 'rb') as file:
+            dictionary = Strings.ReadDictionary(file)
+    finally:
+        reader.ShowTimings = showTimings
+
+    for name, expected, written in (('Component offset', record.ComponentDescOffset, MDLHeader.ComponentDescOffset),
+                                    ('Ref point offset', record.RefPointOffset, MDLHeader.RefPointOffset),
+                                    ('Anim node offset', record.AnimNodeOffset, MDLHeader.AnimNodeOffset),
+                                    ('Dictionary offset', record.DictOffset, MDLHeader.DictOffset),
+                                    ('Dictionary entry count', record.DictEntriesCount, MDLHeader.DictEntriesCount),
+                                    ('Component count', record.ComponentCount, MDLHeader.ComponentCount)):
+        if (expected != written):
+            problems.append('%s is %d, expected %d' % (name, written, expected))
+    if (len(dictionary) != MDLHeader.DictEntriesCount):
+        problems.append('Only %d of the %d dictionary strings could be read' % (len(dictionary), MDLHeader.DictEntriesCount))
+
+    if (len(writtenMeshes) != len(record.Meshes)):
+        problems.append('File has %d meshes, %d were exported' % (len(writtenMeshes), len(record.Meshes)))
+    for exportedMesh, writtenMesh in zip(record.Meshes, writtenMeshes):
+        problems += VerifyMesh(exportedMesh, writtenMesh)
+
+    return problems
+
+def VerifyMesh(exportedMesh: ExportedMesh, writtenMesh):
+    problems = []
+    meshName = '%s (component %d mesh %d, %s)' % (exportedMesh.Name, writtenMesh.ComponentIndex, writtenMesh.MeshIndex, writtenMesh.Mesh.TextureName)
+
+    stripLengths = [strip.VertexCount for strip in writtenMesh.Strips]
+    if (stripLengths != list(exportedMesh.StripLengths)):
+        problems.append('%s: strip lengths %s, expected %s' % (meshName, stripLengths, list(exportedMesh.StripLengths)))
+        #The vertices won't line up so there is no point comparing them
+        return problems
+    triangleCount = sum(max(length - 2, 0) for length in stripLengths)
+    if (triangleCount != exportedMesh.TriangleCount):
+        problems.append('%s: %d triangles, expected %d' % (meshName, triangleCount, exportedMesh.TriangleCount))
+
+    written = Strips.DecodeStrips(writtenMesh.Strips)
+    expectedNormals = np.asarray(exportedMesh.Normals, dtype=np.float32).reshape(-1, 3)
+    normalLengths = np.linalg.norm(expectedNormals, axis=1, keepdims=True)
+    expectedNormals = np.divide(expectedNormals, normalLengths, out=np.zeros_like(expectedNormals), where=normalLengths > 0)
+    expectedUVs = np.asarray(exportedMesh.UVs, dtype=np.float32).reshape(-1, 2).copy()
+    expectedUVs[:, 0] = np.clip(expectedUVs[:, 0], UVRange[0], UVRange[1])
+    #The UV y gets flipped before it is clamped
+    expectedUVs[:, 1] = 1 - np.clip(1 - expectedUVs[:, 1], UVRange[0], UVRange[1])
+
+    comparisons = (('position', written.VertexPositions, np.asarray(exportedMesh.Positions, dtype=np.float32).reshape(-1, 3), PositionTolerance),
+                   ('normal', written.Normals, expectedNormals, NormalTolerance),
+                   ('UV', written.UVs, expectedUVs, UVTolerance),
+                   ('colour', written.VertexColours, np.asarray(exportedMesh.Colours, dtype=np.float32).reshape(-1, 4), ColourTolerance),
+                   ('bone weight', written.BoneWeight, np.asarray(exportedMesh.BoneWeights, dtype=np.float32), WeightTolerance),
+                   ('bone 1', written.Bone1, np.asarray(exportedMesh.Bone1, dtype=np.int32), 0),
+                   ('bone 2', written.Bone2, np.asarray(exportedMesh.Bone2, dtype=np.int32), 0))
+    for name, writtenValues, expectedValues, tolerance in comparisons:
+        if (len(writtenValues) != len(expectedValues)):
+            problems.append('%s: %d %s values, expected %d' % (meshName, len(writtenValues), name, len(expectedValues)))
+            continue
+        if (len(writtenValues) == 0):
+            continue
+        #Tolerance scales with the size of the value for the positions, since they are stored as floats
+        scale = np.maximum(np.abs(expectedValues), 1) if name == 'position' else 1
+        error = np.abs(writtenValues.astype(np.float32) - expectedValues) / scale
+        if (error.ndim > 1):
+            error = error.max(axis=1)
+        badVertices = np.flatnonzero(error > tolerance)
+        if (len(badVertices) > 0):
+            listed = ', '.join('%d (%s vs %s)' % (v, np.round(writtenValues[v].astype(np.float64), 4).tolist(), np.round(expectedValues[v].astype(np.float64), 4).tolist()) for v in badVertices[:MaxListedVertices])
+            problems.append('%s: %d %s mismatches, max error %.6f, vertices %s' % (meshName, len(badVertices), name, float(error.max()), listed))
+    return problems
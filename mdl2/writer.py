@@ -0,0 +1,506 @@
+import struct
+import time
+import numpy as np
+
+from io import BytesIO
+from .reader import ModelScaleRatio, Strips, RunSteps
+from .verifier import ExportRecord, ExportedMesh
+
+#Turns a model made of plain arrays into the bytes of a MDL without needing blender, the exporter gathers the model from the scene
+#Everything in the model is in blender units with Z up, the writer scales it and swaps the y and z
+
+#Print how long each part of writing took
+ShowTimings = True
+#Set when any UVs had to be clamped, whoever is writing resets it first
+UVsTooBig = False
+#The header stores the component count as a signed short
+MaxComponentCount = 32767
+
+#Bytes before the vertex identifier in each strip
+FirstStripHeaderPart1 = b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\x02\x6C'
+SecondStripHeaderPart1 = b'\xFF\xFF\x00\x01\x00\x00\x00\x14\x00\x80\x02\x6C'
+StripHeaderPart2 = b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x40\x3E\x30\x12\x04\x00\x00\x00\x00\x00\x00\x04\x01\x00\x01'
+
+StripEnd = b'\xFF\xFF\x00\x01\x00\x00\x00\x14'
+StripLastRow = b'\x00\x00\x00\x60\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+
+VertexIdentifier = b'\x02\x80\x08\x68'
+NormalIdentifier = b'\x03\x80\x08\x6E'
+UVIdentifier = b'\x04\x80\x08\x6D'
+ColourIdentifier = b'\x05\xC0\x08\x6E'
+
+#Scene values of a mesh's vertices, one entry per vertex (blender units, Z up)
+#Bones are the anim node indices, -1 for none
+VertexType = np.dtype([('Position', '<f4', 3), ('Normal', '<f4', 3), ('UV', '<f4', 2), ('Colour', '<f4', 4), ('Bone1', '<i2'), ('Bone2', '<i2'), ('BoneWeight', '<f4')])
+
+class MDLModel:
+    __slots__ = ('MatrixCount', 'BoundingBoxStart', 'BoundingBoxLength', 'CreationTime', 'SourceFileName', 'Components', 'RefPoints', 'AnimNodePositions')
+
+    def __init__(self):
+        #Each fragment has a unique ID, and every other mesh has 1
+        self.MatrixCount = 1
+        self.BoundingBoxStart = (0.0, 0.0, 0.0)
+        self.BoundingBoxLength = (0.0, 0.0, 0.0)
+        self.CreationTime = int(time.time())
+        self.SourceFileName = 'Untitled.blend'
+        self.Components = []
+        #None when there is no ref points collection, the offset only gets written when there is one
+        self.RefPoints = None
+        self.AnimNodePositions = []
+
+class ModelComponent:
+    __slots__ = ('Name', 'AnimID', 'ObjectID', 'SubObjectType', 'BoundingBoxStart', 'BoundingBoxLength', 'Origin', 'Meshes')
+
+    def __init__(self, name: str = ''):
+        self.Name = name
+        #Fragments have a /anim= ID, None for every other component (they share a blank one)
+        self.AnimID = None
+        self.ObjectID = 0
+        #2 when the anim nodes are exported
+        self.SubObjectType = 0
+        self.BoundingBoxStart = (0.0, 0.0, 0.0)
+        self.BoundingBoxLength = (0.0, 0.0, 0.0)
+        self.Origin = (0.0, 0.0, 0.0)
+        self.Meshes = []
+
+#One material of a object, meshes from the same object can share the vertex buffer
+class ModelMesh:
+    __slots__ = ('Name', 'TextureName', 'Vertices', 'Faces')
+
+    def __init__(self, name: str = ''):
+        self.Name = name
+        #None leaves the texture name offset blank
+        self.TextureName = ''
+        self.Vertices = np.zeros(0, dtype=VertexType)
+        #Triangles indexing the vertices (F, 3)
+        self.Faces = np.zeros((0, 3), dtype=np.int32)
+
+class ModelRefPoint:
+    __slots__ = ('Name', 'Position', 'Size')
+
+    def __init__(self, name: str = ''):
+        self.Name = name
+        self.Position = (0.0, 0.0, 0.0)
+        self.Size = 1.0
+
+#Returns the bytes of the MDL, the offsets and what got written go into the record when there is one
+def WriteMDLBytes(model: MDLModel, record: ExportRecord = None):
+    return RunSteps(WriteMDLBytesSteps(model, record))
+
+#Same as WriteMDLBytes, one step for each mesh's strips since making the strips is most of the time
+def WriteMDLBytesSteps(model: MDLModel, record: ExportRecord = None):
+    file = BytesIO()
+    startTime = time.time()
+    refPointCount = len(model.RefPoints) if model.RefPoints != None else 0
+
+    #MDL Header
+    file.write(b'MDL2')
+    file.write(struct.pack('<hhhh', model.MatrixCount, len(model.Components), refPointCount, len(model.AnimNodePositions)))
+    #Come back on the second pass for offset
+    componentDescOffset = file.tell()
+    file.write(struct.pack('<I', 0))
+    refPointsOffset = file.tell()
+    file.write(struct.pack('<I', 0))
+    animNodeOffset = file.tell()
+    file.write(struct.pack('<III', 0, 0, 0))
+
+    #Bounding Box Start Point and Length (Including the seemingly unused W value)
+    file.write(PackVector(model.BoundingBoxStart))
+    file.write(PackVector(model.BoundingBoxLength))
+
+    dictionaryCountOffset = file.tell()
+    file.write(struct.pack('<I', 0)) #Come back to the dictionary entry count later
+    dictionaryOffset = file.tell()
+    file.write(struct.pack('<I', 0))
+    file.write(struct.pack('<BBBBI', 0, 0, 0, 0, 0)) #Unknown values
+    file.write(struct.pack('<I', model.CreationTime)) #Creation Date
+    originalFileNameOffset = file.tell()
+    file.write(struct.pack('<I', 0))
+    file.write(struct.pack('<IIIIII', 0, 0, 0, 0, 0, 0)) #Unknown values
+
+    WriteOffset(file, componentDescOffset, record, 'ComponentDescOffset')
+    headerTime = time.time() - startTime
+    startTime = time.time()
+
+    #Component Descriptors
+    componentNameOffsets = []
+    animIDOffsets = []
+    meshDescOffsets = []
+    for component in model.Components:
+        file.write(PackVector(component.BoundingBoxStart))
+        file.write(PackVector(component.BoundingBoxLength))
+        file.write(PackVector(component.Origin))
+        componentNameOffsets.append(file.tell())
+        file.write(struct.pack('<I', 0))
+        animIDOffsets.append(file.tell())
+        file.write(struct.pack('<I', 0))
+        file.write(struct.pack('<I', 0)) #Unknown
+        file.write(struct.pack('<I', component.SubObjectType))
+        #Object ID, each fragment needs a unique ID above 0
+        file.write(struct.pack('<hh', component.ObjectID, len(component.Meshes)))
+        meshDescOffsets.append(file.tell())
+        file.write(struct.pack('<I', 0))
+        file.write(struct.pack('<I', 0)) #Unknown
+        file.write(struct.pack('<I', 0)) #Misc Pointer?
+
+    componentTime = time.time() - startTime
+    startTime = time.time()
+
+    #Ref Points
+    refPointNameOffsets = []
+    if (model.RefPoints != None):
+        WriteOffset(file, refPointsOffset, record, 'RefPointOffset')
+        for point in model.RefPoints:
+            file.write(PackVector(point.Position, point.Size * ModelScaleRatio))
+            refPointNameOffsets.append(file.tell())
+            file.write(struct.pack('<I', 0))
+            file.write(struct.pack('<I', 0)) #Unknown
+            file.write(struct.pack('<ff', 1, 0)) #Unknown Weight Values (The first one is usually 1)
+
+    refPointsTime = time.time() - startTime
+    startTime = time.time()
+
+    #Mesh Descriptors, each material of a object is a separate mesh
+    meshes = []
+    textureNameOffsets = []
+    stripListOffsets = []
+    for index, component in enumerate(model.Components):
+        WriteOffset(file, meshDescOffsets[index])
+        for mesh in component.Meshes:
+            meshes.append(mesh)
+            textureNameOffsets.append(file.tell())
+            file.write(struct.pack('<I', 0))
+            stripListOffsets.append(file.tell())
+            file.write(struct.pack('<I', 0))
+            file.write(struct.pack('<I', 0)) #Max Offset? Seemingly Unused
+            file.write(struct.pack('<I', 0)) #Mesh Strip Count
+
+    meshDescriptorTime = time.time() - startTime
+    startTime = time.time()
+
+    #Strips
+    encodedBuffers = {}
+    for meshIndex, mesh in enumerate(meshes):
+        if (len(mesh.Faces) == 0):
+            continue
+        #Encode the whole vertex buffer once, even when other materials use it too
+        if (id(mesh.Vertices) not in encodedBuffers):
+            encodedBuffers[id(mesh.Vertices)] = (EncodePositions(mesh.Vertices), EncodeNormals(mesh.Vertices), EncodeUVs(mesh.Vertices, mesh.Name), EncodeColours(mesh.Vertices))
+        stripsIDX = StripGenerater(mesh.Faces.tolist()).gen_strips()
+        WriteStrips(file, stripListOffsets[meshIndex], encodedBuffers[id(mesh.Vertices)], stripsIDX)
+        if (record != None):
+            record.Meshes.append(RecordMesh(mesh.Name, mesh.Vertices, mesh.Faces, stripsIDX))
+        yield (meshIndex + 1) / len(meshes)
+
+    stripTime = time.time() - startTime
+    startTime = time.time()
+
+    #Anim Nodes
+    WriteOffset(file, animNodeOffset, record, 'AnimNodeOffset')
+    for nodePosition in model.AnimNodePositions:
+        file.write(PackPosition(nodePosition))
+        file.write(struct.pack('<I', 0))
+
+    #String List
+    WriteOffset(file, dictionaryOffset, record, 'DictOffset')
+    dictionaryCount = 0
+    textureDict = {}
+    noAnimIDsOffset = 0
+    meshIndex = 0
+    for index, component in enumerate(model.Components):
+        WriteOffset(file, componentNameOffsets[index])
+        WriteString(file, component.Name)
+        dictionaryCount += 1
+
+        if (component.AnimID != None):
+            WriteOffset(file, animIDOffsets[index])
+            WriteString(file, component.AnimID)
+            dictionaryCount += 1
+        else:
+            if (noAnimIDsOffset == 0):
+                noAnimIDsOffset = file.tell()
+                #Just write a empty string
+                WriteString(file, '')
+                dictionaryCount += 1
+            PatchInt(file, animIDOffsets[index], noAnimIDsOffset)
+
+        #Mesh textures, each one only gets written once
+        for mesh in component.Meshes:
+            if (mesh.TextureName != None):
+                if (mesh.TextureName not in textureDict):
+                    textureDict[mesh.TextureName] = file.tell()
+                    WriteString(file, mesh.TextureName)
+                    dictionaryCount += 1
+                PatchInt(file, textureNameOffsets[meshIndex], textureDict[mesh.TextureName])
+            meshIndex += 1
+
+    WriteOffset(file, originalFileNameOffset)
+    WriteString(file, model.SourceFileName)
+    dictionaryCount += 1
+
+    for index, point in enumerate(refPointNameOffsets):
+        WriteOffset(file, point)
+        WriteString(file, model.RefPoints[index].Name)
+        dictionaryCount += 1
+
+    PatchInt(file, dictionaryCountOffset, dictionaryCount)
+    #Doesn't seem to be needed just adding it though just in case
+    #Also don't need to add it to the dictionary count and doesn't need a string terminator
+    file.write(b'end')
+
+    stringListTime = time.time() - startTime
+
+    if (record != None):
+        record.ComponentCount = len(model.Components)
+        record.DictEntriesCount = dictionaryCount
+
+    if (ShowTimings):
+        print('Header Time (Sec):', headerTime)
+        print('Sub Object Descriptor Time (Sec):', componentTime)
+        print('Ref Points Time (Sec):', refPointsTime)
+        print('Mesh Descriptor Time (Sec):', meshDescriptorTime)
+        print('Strip Gen Time (Sec):', stripTime)
+        print('String List Time (Sec):', stringListTime)
+        print('Write Total Time (Sec):', (headerTime + componentTime + refPointsTime + meshDescriptorTime + stripTime + stringListTime))
+
+    return file.getvalue()
+
+def WriteStrips(file, stripListOffset: int, encodedBuffer, stripsIDX: list):
+    encodedPositions, encodedNormals, encodedUVs, encodedColours = encodedBuffer
+    stripLocation = file.tell()
+    #Strip offset, Max offset? and Strip count
+    PatchInt(file, stripListOffset, stripLocation)
+    PatchInt(file, stripListOffset + 8, len(stripsIDX))
+
+    for s, strip in enumerate(stripsIDX):
+        strip = np.array(strip, dtype=np.int64)
+        file.write(FirstStripHeaderPart1 if s == 0 else SecondStripHeaderPart1)
+        file.write(struct.pack('<i', len(strip)))
+        file.write(StripHeaderPart2)
+
+        file.write(VertexIdentifier)
+        file.write(encodedPositions[strip].tobytes())
+        file.write(NormalIdentifier)
+        file.write(encodedNormals[strip].tobytes())
+        file.write(UVIdentifier)
+        file.write(encodedUVs[strip].tobytes())
+        file.write(ColourIdentifier)
+        file.write(encodedColours[strip].tobytes())
+
+    #Add the strip ending and pad it like is in Krome's MDLs
+    file.write(StripEnd)
+    rowPosition = file.tell() % 16 #0 when on a new row
+    if (rowPosition != 0):
+        file.write(bytes(16 - rowPosition)) #pad out the rest of the row like the MDLs do
+    file.write(StripLastRow)
+
+#Scales a blender position up for the game and swaps the y and z
+def PackPosition(vector):
+    return struct.pack('<fff', vector[0] * ModelScaleRatio, vector[2] * ModelScaleRatio, vector[1] * ModelScaleRatio)
+
+#Same as PackPosition with the W value after it
+def PackVector(vector, w: float = 0.0):
+    return PackPosition(vector) + struct.pack('<f', w)
+
+def WriteString(file, string: str):
+    file.write(bytes(string, 'utf-8'))
+    file.write(b'\x00') #String terminator
+
+#Writes a int at a earlier position then goes back to the end of the file
+def PatchInt(file, offset: int, value: int):
+    file.seek(offset)
+    file.write(struct.pack('<I', value))
+    file.seek(0, 2)
+
+#Points the int at offset to the end of the file, which is where the next thing gets written
+def WriteOffset(file, offset: int, record: ExportRecord = None, recordField: str = None):
+    location = file.tell()
+    PatchInt(file, offset, location)
+    if (record != None and recordField != None):
+        setattr(record, recordField, location)
+
+def EncodePositions(vertices):
+    #Swap the y and z and scale up for the game
+    return (vertices['Position'][:, [0, 2, 1]] * ModelScaleRatio).astype('<f4')
+
+def EncodeNormals(vertices):
+    encoded = np.zeros(len(vertices), dtype=Strips.NormalType)
+    encoded['Normal'] = np.trunc(vertices['Normal'][:, [0, 2, 1]] * 127)
+    encoded['Bone2'] = (vertices['Bone2'] + 1) * 2
+    return encoded
+
+def EncodeUVs(vertices, meshName):
+    UVCoords = vertices['UV'].copy()
+    #UVs are inverted vertically so 1 - the vector to invert the 0-1 range, eg. 0 becomes 1, 1 become 0, 0.25 becomes 0.75
+    UVCoords[:, 1] = 1 - UVCoords[:, 1]
+    UVCoords *= 4096
+    if (UVCoords.max(initial=0) > 32767 or UVCoords.min(initial=0) < -32768):
+        print("Warning UV coordinate too small/big in mesh, " + meshName + ", clamping in the export")
+        global UVsTooBig
+        UVsTooBig = True
+
+    encoded = np.zeros(len(vertices), dtype=Strips.UVType)
+    encoded['UV'] = np.trunc(np.clip(UVCoords, -32768, 32767))
+    encoded['BoneWeight'] = np.floor(vertices['BoneWeight'].astype(np.float64) * 4096)
+    encoded['Bone1'] = (vertices['Bone1'] + 1) * 4
+    return encoded
+
+def EncodeColours(vertices):
+    #Convert each colour channel to a 0-255 range, then halve it so 1.0 becomes 0x80
+    colours = vertices['Colour'] * np.float32(255)
+    encoded = np.where(np.trunc(colours).astype(np.int64) & 1, np.trunc((colours + 1) / 2), np.trunc(colours / 2 + 1))
+    encoded[vertices['Colour'] == 0] = 0
+    return encoded.astype(np.uint8)
+
+#Scene values of the vertices in the order they got written, for verifying the export
+def RecordMesh(meshName, vertices, faceIDX, stripsIDX):
+    exportedMesh = ExportedMesh(meshName)
+    exportedMesh.TriangleCount = len(faceIDX)
+    exportedMesh.StripLengths = [len(strip) for strip in stripsIDX]
+    stripVertices = vertices[np.concatenate([np.array(strip, dtype=np.int64) for strip in stripsIDX])] if len(stripsIDX) > 0 else vertices[:0]
+    exportedMesh.Positions = stripVertices['Position']
+    exportedMesh.Normals = stripVertices['Normal']
+    exportedMesh.UVs = stripVertices['UV']
+    exportedMesh.Colours = stripVertices['Colour']
+    exportedMesh.BoneWeights = stripVertices['BoneWeight']
+    exportedMesh.Bone1 = stripVertices['Bone1']
+    exportedMesh.Bone2 = stripVertices['Bone2']
+    return exportedMesh
+
+#Credit to Zawata for his strip gen code
+class StripGenerater():
+    # [ (<v_idxs of face>), (<v_idxs of face>), (<v_idxs of face>)]
+    face_list = None
+
+    # {
+    #   <'sorted_edge'>: <list of faces using said edge>
+    # }
+    edge_dict = None
+
+    # [
+    #   [<face_index>,<list of adj faces>],
+    #   ...
+    # ]
+    conn_list = None
+
+    # [<face_used?>, <face_used?>, <face_used?>]
+    face_usage = None
+
+    @staticmethod
+    def _sort_edge(e):
+        assert(len(e) == 2)
+        return (min(e), max(e))
+
+    @staticmethod
+    def _add_or_append(dct, key, val):
+        if key in dct:
+            dct[key].append(val)
+        else:
+            dct[key] = [val]
+
+    @staticmethod
+    def _get_third_vert(face, edge):
+        f_list = list(face)
+        f_list.remove(edge[0])
+        f_list.remove(edge[1])
+
+        assert(len(f_list) == 1)
+        return f_list[0]
+
+    def __init__(self, faces):
+        self.face_list = faces
+
+        edge_dict = {}
+        for i,f in enumerate(faces):
+            assert(len(f) == 3)
+
+            self._add_or_append(edge_dict, self._sort_edge(f[:2]), i)
+            self._add_or_append(edge_dict, self._sort_edge(f[0::2]), i)
+            self._add_or_append(edge_dict, self._sort_edge(f[1:]), i)
+
+        self.edge_dict = edge_dict
+        #Edges in the order they were first found, so the edges of a face keep the same order without searching every edge
+        self.edge_order = dict((e, i) for i, e in enumerate(edge_dict))
+
+        adj_list = [[i,0] for i in range(len(faces))]
+        for _,face_list in edge_dict.items():
+            #Non manifold edges have more than 2 faces, every face on them counts as connected
+            if len(face_list) > 1:
+                for f in face_list:
+                    adj_list[f][1] += 1
+        adj_list.sort(key=lambda x:x[1])
+
+        self.conn_list = adj_list
+        #Faces before this in conn_list have all been used
+        self.start_index = 0
+
+        self.face_usage = [False] * len(faces)
+
+    def get_edges_of_face(self, face):
+        f = self.face_list[face]
+        edges = {self._sort_edge(f[:2]), self._sort_edge(f[0::2]), self._sort_edge(f[1:])}
+
+        assert(len(edges) == 3)
+        return sorted(edges, key=self.edge_order.get)
+
+    def mark_face_as_done(self, face):
+        assert(not self.face_usage[face])
+        self.face_usage[face] = True
+
+    def get_next_start_face(self):
+        while self.start_index < len(self.conn_list):
+            i = self.conn_list[self.start_index][0]
+            if not self.face_usage[i]:
+                return i
+            self.start_index += 1
+        return None
+
+
+    def get_next_face(self, edge, not_face):
+        f_list = self.edge_dict[self._sort_edge(edge)]
+        #Non manifold edges can have more than 2 faces, carry on with the first one that is still free
+        for f in f_list:
+            if f != not_face and not self.face_usage[f]:
+                return f
+        return None
+
+    def compute_best_strip(self, face):
+        #iterate all 3 sides of the triangle
+        tristrip = []
+        for i,e in enumerate(self.get_edges_of_face(face)):
+            tristrip.append(self.gen_strip(face, e))
+
+        best_len = max([len(l) for l,_ in tristrip])
+        for l,f_list in tristrip:
+            if len(l) == best_len:
+                for f in f_list:
+                    self.mark_face_as_done(f)
+                return l
+
+    def gen_strip(self, face, edge):
+        this_face = face
+        this_edge = edge
+        strip_faces = []
+        tristrip = []
+
+        tristrip.append(this_edge[0])
+        tristrip.append(this_edge[1])
+        while True:
+            tristrip.append(self._get_third_vert(self.face_list[this_face], this_edge))
+            strip_faces.append(this_face)
+
+            this_edge = self._sort_edge(tristrip[-2:])
+            this_face = self.get_next_face(this_edge, this_face)
+            if not this_face or this_face in strip_faces or self.face_usage[this_face]:
+                break
+        #TODO: reverse generation
+        return (tristrip, strip_faces)
+
+    def gen_strips(self):
+        strip_list = []
+
+        next_face = self.get_next_start_face()
+        while next_face != None:
+            strip_list.append(self.compute_best_strip(next_face))
+            next_face = self.get_next_start_face()
+        return strip_list